@@ -0,0 +1,110 @@
+# core_batch.py
+# 전투력(CP) 일괄 계산: N개의 빌드를 NumPy 배열로 받아 calculate_power_detailed와 같은 결과를 한 번에 계산
+import numpy as np
+from core_constants import OVERLOAD_DATA, OPTION_LIST
+from core_build import OPTION_IDS, COL_GRADES
+
+# 옵션 종류 코드 = core_build.OptionType (OPTION_LIST 인덱스, 0 = 옵션없음)
+OPTION_CODE = OPTION_IDS
+N_OPTIONS = len(OPTION_LIST)
+# 소장품 등급 코드 (COL_GRADES 인덱스)
+COL_GRADE_CODE = {g: i for i, g in enumerate(COL_GRADES)}
+
+# 옵션 코드 x 단계 -> 수치 (범위 밖 단계는 0, option_value와 동일)
+N_STAGES = max(len(v) for v in OVERLOAD_DATA.values())
+VALUE_TABLE = np.zeros((N_OPTIONS, N_STAGES))
+for _name, _values in OVERLOAD_DATA.items():
+    VALUE_TABLE[OPTION_CODE[_name], :len(_values)] = _values
+# 옵션 코드 -> 최대(15단계) 수치 / 단계당 CP 계수
+MAX_TABLE = np.array([OVERLOAD_DATA[n][-1] if n in OVERLOAD_DATA else 0.0 for n in OPTION_LIST])
+CP_MULT_TABLE = np.array([0.00828 if n == "우월코드 대미지 증가" else 0.0069 for n in OPTION_LIST])
+# 소장품 등급 코드 -> (기본 계수, 스킬2 반영 여부, 최대값)
+COL_BASE = np.array([0.0, 6.33, 10.66, 15.00])
+COL_USES_SKILL2 = np.array([False, False, True, True])
+COL_MAX = np.array([1.0, 15 + 6.33, 15 + 15 + 10.66, 15 + 15 + 15.00])
+
+def encode_builds(builds):
+    """Build 목록 -> calculate_power_batch 위치 인자 (valid_mask 제외)"""
+    b = builds
+    return ([x.hp for x in b], [x.atk for x in b], [x.def_ for x in b], [x.s1 for x in b], [x.s2 for x in b],
+            [x.burst for x in b], [x.types for x in b], [x.stages for x in b], [x.cube_lvl for x in b],
+            [COL_GRADE_CODE[x.col_grade] for x in b], [x.col_skill1 for x in b], [x.col_skill2 for x in b])
+
+def valid_ops_mask(nikke_data):
+    """니케의 유효 옵션 -> 옵션 코드별 bool 배열"""
+    valid_ops = nikke_data.get('overload', {}).get('valid_ops', []) if nikke_data else []
+    return np.array([name in valid_ops for name in OPTION_LIST])
+
+def calculate_power_batch(hp, atk, def_, skill1, skill2, burst, opt_types, opt_stages,
+                          cube_lvl, col_grade, col_skill1, col_skill2, valid_mask):
+    """
+    N개 빌드의 전투력/종결도를 일괄 계산합니다.
+    hp/atk/def_/skill*/cube_lvl/col_skill*: (N,) 배열, col_grade: (N,) 등급 코드 (COL_GRADES 인덱스)
+    opt_types / opt_stages: (N, 4, 3) 옵션 코드 / 단계, valid_mask: (N, 옵션 수) 또는 (옵션 수,) 유효 옵션 여부
+    부동소수 합산 순서를 단일 계산(calculate_power_detailed)과 같게 맞춰 결과가 비트 단위로 일치합니다.
+    반환: 결과 배열 dict (power, score, 세부 CP/퍼센트, 옵션별 합계 agg_* (N, 옵션 수))
+    """
+    hp, atk, def_ = (np.asarray(x, dtype=float) for x in (hp, atk, def_))
+    skill1, skill2, burst, cube_lvl, col_skill1, col_skill2 = (
+        np.asarray(x, dtype=np.int64) for x in (skill1, skill2, burst, cube_lvl, col_skill1, col_skill2))
+    col_grade = np.asarray(col_grade, dtype=np.int64)
+    types = np.asarray(opt_types, dtype=np.int64).reshape(len(hp), -1)
+    stages = np.asarray(opt_stages, dtype=np.int64).reshape(len(hp), -1)
+    n = len(hp)
+    valid = np.broadcast_to(np.asarray(valid_mask, dtype=bool), (n, N_OPTIONS))
+    rows = np.arange(n)
+
+    # 1. 기본 스탯 / 스킬 / 큐브 / 소장품 계수
+    base_sum = 0.7 * hp + 19.35 * atk + 70.0 * def_
+    base_coeff = 1.3
+    skill_coeff = (0.01 * skill1) + (0.01 * skill2) + (0.02 * burst)
+    cube_coeff = 0.0092 * cube_lvl
+    col_skill = np.where(COL_USES_SKILL2[col_grade], col_skill1 + col_skill2, col_skill1)
+    col_coeff_val = np.where(col_grade > 0, col_skill + COL_BASE[col_grade], 0)
+    col_coeff = 0.0069 * col_coeff_val
+
+    # 2. 오버로드: 12줄을 순서대로 누적 (줄 단위 연산은 N개 빌드에 대해 벡터화)
+    total_ol_cp_coeff = np.zeros(n)
+    total_ol_score = np.zeros(n)
+    agg_curr = np.zeros((n, N_OPTIONS))
+    agg_max = np.zeros((n, N_OPTIONS))
+    agg_count = np.zeros((n, N_OPTIONS), dtype=np.int64)
+    agg_cp = np.zeros((n, N_OPTIONS))
+    for line in range(types.shape[1]):
+        t, s = types[:, line], stages[:, line]
+        used = t != 0
+        cp_coeff = np.where(used, s * CP_MULT_TABLE[t], 0.0)
+        total_ol_cp_coeff += cp_coeff
+        in_range = (s >= 0) & (s < N_STAGES)
+        current = np.where(in_range, VALUE_TABLE[t, np.clip(s, 0, N_STAGES - 1)], 0.0)
+        max_single = MAX_TABLE[t]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct_single = np.where(max_single > 0, current / max_single * 100, 0.0)
+        weight = np.where(valid[rows, t], 1.0, 0.0)
+        total_ol_score += np.where(used, (pct_single / 100) * weight * 100, 0.0)
+
+        u = rows[used]
+        agg_curr[u, t[used]] += current[used]
+        agg_max[u, t[used]] += max_single[used]
+        agg_count[u, t[used]] += 1
+        agg_cp[u, t[used]] += (base_sum[used] * cp_coeff[used]) / 100
+
+    total_coeff = base_coeff + skill_coeff + total_ol_cp_coeff + cube_coeff + col_coeff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agg_pct = np.where(agg_max > 0, agg_curr / agg_max * 100, 0.0)
+
+    return {
+        "power": np.rint((base_sum * total_coeff) / 100).astype(np.int64),
+        "score": (total_ol_score / 1200) * 100,
+        "base_cp": (base_sum * base_coeff) / 100,
+        "skill_cp": (base_sum * skill_coeff) / 100,
+        "skill_pct": ((skill1 + skill2 + burst) / 30) * 100,
+        "cube_cp": (base_sum * cube_coeff) / 100,
+        "cube_pct": np.where(cube_lvl > 0, (cube_lvl / 15) * 100, 0),
+        "col_cp": (base_sum * col_coeff) / 100,
+        "col_pct": np.where(col_grade > 0, (col_coeff_val / COL_MAX[col_grade]) * 100, 0),
+        "ol_cp": (base_sum * total_ol_cp_coeff) / 100,
+        "agg_curr": agg_curr, "agg_max": agg_max, "agg_count": agg_count,
+        "agg_cp": agg_cp, "agg_pct": agg_pct, "agg_valid": valid.copy(),
+        "opt_types": types,
+    }
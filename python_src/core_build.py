@@ -0,0 +1,141 @@
+# core_build.py
+# 육성 빌드 값 타입: 문자열 대신 옵션 ID / 정수 단계로 보관하는 불변(hashable) 빌드
+from enum import IntEnum
+from core_constants import OVERLOAD_DATA, OPTION_LIST, PARTS
+
+# 옵션 종류 ID = OPTION_LIST 인덱스 (0 = 옵션없음)
+_OPTION_KEYS = {
+    "옵션없음": "NONE", "우월코드 대미지 증가": "ELEMENT_DMG", "명중률 증가": "HIT_RATE",
+    "최대 장탄 수 증가": "MAX_AMMO", "공격력 증가": "ATK", "차지 대미지 증가": "CHARGE_DMG",
+    "차지 속도 증가": "CHARGE_SPEED", "크리티컬 확률 증가": "CRIT_RATE", "크리티컬 대미지 증가": "CRIT_DMG",
+    "방어력 증가": "DEF",
+}
+OptionType = IntEnum("OptionType", [(_OPTION_KEYS[name], i) for i, name in enumerate(OPTION_LIST)])
+OPTION_IDS = {name: i for i, name in enumerate(OPTION_LIST)}
+NO_OPTION = OptionType.NONE
+
+# 옵션 ID -> 단계별 수치 / 최대(15단계) 수치 / 단계당 CP 계수
+STAGE_VALUES = tuple(tuple(OVERLOAD_DATA.get(name, (0,))) for name in OPTION_LIST)
+MAX_VALUES = tuple(OVERLOAD_DATA[name][-1] if name in OVERLOAD_DATA else 0 for name in OPTION_LIST)
+CP_MULTIPLIERS = tuple(0.00828 if name == "우월코드 대미지 증가" else 0.0069 for name in OPTION_LIST)
+
+# 단계 콤보박스 표시 문자열 (기존 f"{k}단계 ({v}%)" 형식, 옵션없음은 "0단계 (0.00%)")
+EMPTY_STAGE_LABEL = "0단계 (0.00%)"
+STAGE_LABELS = tuple(
+    tuple(f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[name])) if name in OVERLOAD_DATA else (EMPTY_STAGE_LABEL,)
+    for name in OPTION_LIST
+)
+_LABEL_STAGE = {label: k for labels in STAGE_LABELS for k, label in enumerate(labels)}
+
+LINES_PER_PART = 3
+N_LINES = len(PARTS) * LINES_PER_PART
+COL_GRADES = ("None", "R", "SR", "SSR")
+
+def stage_labels(option):
+    """옵션(이름 또는 ID)의 단계 선택지 목록 (미리 만든 튜플 재사용)"""
+    opt_id = OPTION_IDS.get(option, NO_OPTION) if isinstance(option, str) else option
+    return STAGE_LABELS[opt_id]
+
+def parse_stage(stage):
+    """단계 문자열("4단계 (6.88%)" / "4") 또는 정수 -> 단계 번호 (해석 불가 시 0)"""
+    if isinstance(stage, int): return stage
+    k = _LABEL_STAGE.get(stage)
+    if k is not None: return k
+    try: return int(stage.split("단계")[0].strip())
+    except (ValueError, AttributeError): return 0
+
+def option_value(opt_id, stage):
+    """옵션 단계 수치 (범위 밖 단계는 0)"""
+    values = STAGE_VALUES[opt_id]
+    return values[stage] if opt_id and 0 <= stage < len(values) else 0
+
+def _number(value):
+    """스탯 입력값: 정수로 읽히면 int, 아니면 float (숫자로 정규화되므로 "01000"은 1000으로 저장)"""
+    if isinstance(value, (int, float)): return value
+    try: return int(value)
+    except (TypeError, ValueError): return float(value)
+
+class Build:
+    """
+    니케 1명의 육성 상태 (기본 스탯, 스킬, 큐브, 소장품, 오버로드 4부위 x 3줄).
+    생성 후 변경할 수 없고 hashable 하므로 계산 결과 캐시 키로 사용할 수 있습니다.
+    오버로드 옵션은 types(옵션 ID) / stages(단계) 튜플로 PARTS 순서, 부위당 3줄씩 보관합니다.
+    """
+    __slots__ = ("hp", "atk", "def_", "s1", "s2", "burst", "cube_lvl",
+                 "col_grade", "col_skill1", "col_skill2", "types", "stages", "_hash")
+
+    def __init__(self, hp, atk, def_, s1, s2, burst, cube_lvl=0, col_grade="None", col_skill1=0, col_skill2=0,
+                 types=None, stages=None):
+        types = tuple(OptionType(t) for t in types) if types is not None else (NO_OPTION,) * N_LINES
+        stages = tuple(int(s) for s in stages) if stages is not None else (0,) * N_LINES
+        if len(types) != N_LINES or len(stages) != N_LINES:
+            raise ValueError(f"오버로드 옵션은 {N_LINES}줄이어야 합니다")
+        if col_grade not in COL_GRADES: raise ValueError(f"알 수 없는 소장품 등급: {col_grade}")
+        values = (_number(hp), _number(atk), _number(def_), int(s1), int(s2), int(burst), int(cube_lvl),
+                  col_grade, int(col_skill1), int(col_skill2), types, stages)
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_hash", hash(values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Build는 변경할 수 없습니다 (replace() 사용)")
+
+    def _key(self):
+        return tuple(getattr(self, name) for name in self.__slots__[:-1])
+
+    def __eq__(self, other):
+        return isinstance(other, Build) and self._key() == other._key()
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return f"Build({', '.join(f'{n}={getattr(self, n)!r}' for n in self.__slots__[:-1])})"
+
+    def replace(self, **changes):
+        """일부 값만 바꾼 새 Build"""
+        values = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        values.update(changes)
+        return Build(**values)
+
+    def with_line(self, line, opt_id=None, stage=None):
+        """line번째 줄(0~11)의 옵션/단계만 바꾼 새 Build"""
+        types, stages = list(self.types), list(self.stages)
+        if opt_id is not None: types[line] = opt_id
+        if stage is not None: stages[line] = stage
+        return self.replace(types=types, stages=stages)
+
+    @classmethod
+    def from_user_data(cls, data):
+        """니케 user_data JSON -> Build (없는 값은 계산 탭 기본값)"""
+        data = data or {}
+        types, stages = [NO_OPTION] * N_LINES, [0] * N_LINES
+        for p, part in enumerate(PARTS):
+            for i, opt in enumerate((data.get("options") or {}).get(part, [])[:LINES_PER_PART]):
+                types[p * LINES_PER_PART + i] = OPTION_IDS.get(opt.get("type"), NO_OPTION)
+                stages[p * LINES_PER_PART + i] = parse_stage(opt.get("stage", EMPTY_STAGE_LABEL))
+        return cls(data.get("hp", "1000000"), data.get("atk", "50000"), data.get("def", "10000"),
+                   data.get("s1", "10"), data.get("s2", "10"), data.get("burst", "10"),
+                   data.get("cube_lvl", "0"), data.get("col_grade", "None"),
+                   data.get("col_skill1", "0"), data.get("col_skill2", "0"), types, stages)
+
+    def to_user_data(self):
+        """Build -> 니케 user_data JSON (계산 탭 저장 형식과 동일: 값은 str(숫자), 단계는 표시 문자열)"""
+        options = {}
+        for p, part in enumerate(PARTS):
+            options[part] = [
+                {"type": OPTION_LIST[self.types[line]], "stage": _stage_label(self.types[line], self.stages[line])}
+                for line in range(p * LINES_PER_PART, (p + 1) * LINES_PER_PART)
+            ]
+        return {
+            "hp": str(self.hp), "atk": str(self.atk), "def": str(self.def_),
+            "s1": str(self.s1), "s2": str(self.s2), "burst": str(self.burst),
+            "cube_lvl": str(self.cube_lvl), "col_grade": self.col_grade,
+            "col_skill1": str(self.col_skill1), "col_skill2": str(self.col_skill2),
+            "options": options,
+        }
+
+def _stage_label(opt_id, stage):
+    labels = STAGE_LABELS[opt_id]
+    if 0 <= stage < len(labels): return labels[stage]
+    return f"{stage}단계"
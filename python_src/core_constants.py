@@ -11,6 +11,7 @@ DB_FILE = os.path.join(BASE_DIR, "nikkedatabase.json")
 TAGS_FILE = os.path.join(BASE_DIR, "all_tags_v3.2.json")
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
 THEMES_FILE = os.path.join(BASE_DIR, "themes.json")
+TAG_CACHE_FILE = os.path.join(BASE_DIR, "tag_cache.json")
 
 CONST_COMPANIES = ["엘리시온", "미실리스", "테트라", "필그림", "어브노멀", "오버스펙", "Unknown"]
 CONST_ROLES = ["화력형", "방어형", "지원형", "Unknown"]
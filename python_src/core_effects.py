@@ -0,0 +1,182 @@
+# core_effects.py
+import re
+import bisect
+import hashlib
+from collections import defaultdict, namedtuple, OrderedDict
+from core_tagger import effect_spans
+
+# 스킬 설명의 효과 1개 (core_tagger.effect_spans 구간): [공격력 95.04% ▲] [10초 유지] -> ("공격력", "▲", 95.04, "%", 10.0, "아군 전체")
+# duration: 초 단위 (지속 = inf, 유지 시간 표기가 없거나 발/회 단위면 None)
+Effect = namedtuple("Effect", "stat direction value unit duration target")
+
+_VALUE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(%|발|초|회|개|기)?')
+_DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(초|발|회)\s*유지$')
+# 효과가 아닌 부가 정보 괄호: [1초 간격] [3 중첩]
+_MODIFIER_RE = re.compile(r'^\d+(?:\.\d+)?\s*(?:초\s*간격|중첩)$')
+_TARGET_RE = re.compile(r'([^\s:]+(?:\s\d*기|\s전체|\s적들)?)에게')
+_SPACE_RE = re.compile(r'\s+')
+
+# 효과 검색 조건: 공격력▲>=50%, 지속>=10초, 대상=아군 전체
+_COND_RE = re.compile(r'^\s*(.*?)\s*(>=|<=|>|<|=)\s*(.+?)\s*$')
+
+def _clean_stat(text):
+    return _SPACE_RE.sub(" ", text).strip(" :")
+
+def _parse_bracket(body):
+    """효과 본문(괄호 안) -> (stat, direction, value, unit) / 수치가 없으면 value None"""
+    direction = "▲" if "▲" in body else ("▼" if "▼" in body else "")
+    body = body.replace("▲", " ").replace("▼", " ")
+    m = _VALUE_RE.search(body)
+    if not m: return _clean_stat(body), direction, None, ""
+    stat = _clean_stat(body[:m.start()] + " " + body[m.end():])
+    return stat, direction, float(m.group(1)), m.group(2) or ""
+
+def parse_effects(text):
+    """
+    스킬 설명을 효과 목록으로 변환합니다.
+    효과 구간은 태거와 같은 effect_spans ([ ] / 「 」 괄호, 괄호 없는 ▲▼ 줄)를 사용합니다.
+    줄 단위로 "...에게:" 앞부분을 대상으로 보고, 유지 시간 괄호는 직전까지의 효과들에 적용합니다.
+    대상이 없는 줄은 윗줄의 대상을 이어받습니다.
+    """
+    effects = []
+    target = ""
+    for line in (text or "").split("\n"):
+        spans = effect_spans(line)
+        head = line[:spans[0].start] if spans else line
+        m = _TARGET_RE.search(head)
+        if m: target = _clean_stat(m.group(1))
+
+        pending = []
+        for span in spans:
+            body = line[span.body_start:span.body_end].strip()
+            dm = _DURATION_RE.match(body)
+            if dm or body == "지속":
+                duration = float("inf") if body == "지속" else (float(dm.group(1)) if dm.group(2) == "초" else None)
+                for i in pending: effects[i] = effects[i]._replace(duration=duration)
+                pending = []
+                continue
+            if _MODIFIER_RE.match(body): continue
+            stat, direction, value, unit = _parse_bracket(body)
+            if not stat: continue
+            pending.append(len(effects))
+            effects.append(Effect(stat, direction, value, unit, None, target))
+    return effects
+
+def text_hash(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def parse_effect_query(query):
+    """
+    "공격력▲>=50%, 지속>=10초, 대상=아군 전체" -> 검색 조건 dict
+    (stat, direction, min_value, max_value, unit, min_duration, max_duration, target)
+    수치 조건의 단위(%, 발 등, 단위 없음 = 고정 수치)는 unit으로 보존해 같은 단위의 효과만 비교합니다.
+    """
+    cond = {"stat": "", "direction": "", "min_value": None, "max_value": None, "unit": None,
+            "min_duration": None, "max_duration": None, "target": ""}
+    for i, part in enumerate(p for p in (query or "").split(",") if p.strip()):
+        m = _COND_RE.match(part)
+        key, op, value = (m.group(1), m.group(2), m.group(3)) if m else (part.strip(), "", "")
+        if key in ("대상", "target"):
+            cond["target"] = value.strip()
+            continue
+        if key in ("지속", "유지", "duration"):
+            lo_key, hi_key = "min_duration", "max_duration"
+        else:
+            if i == 0 or not cond["stat"]:
+                cond["direction"] = "▲" if "▲" in key else ("▼" if "▼" in key else "")
+                cond["stat"] = _clean_stat(key.replace("▲", "").replace("▼", ""))
+            lo_key, hi_key = "min_value", "max_value"
+        if not op: continue
+        vm = _VALUE_RE.match(value.strip())
+        if not vm: raise ValueError(f"수치를 해석할 수 없습니다: {part.strip()}")
+        num = float(vm.group(1))
+        if lo_key == "min_value":
+            unit = vm.group(2) or ""
+            if cond["unit"] is not None and cond["unit"] != unit:
+                raise ValueError(f"수치 조건의 단위가 서로 다릅니다: {part.strip()}")
+            cond["unit"] = unit
+        if op in (">=", ">", "="): cond[lo_key] = num
+        if op in ("<=", "<", "="): cond[hi_key] = num
+        # 초과/미만은 경계값 제외
+        if op == ">": cond[lo_key] = num + 1e-9
+        if op == "<": cond[hi_key] = num - 1e-9
+    return cond
+
+class EffectIndex:
+    """
+    효과 수치 색인.
+    (stat, direction)별로 (value, effect_id) 정렬 리스트를 유지하여 수치 범위 조건을 bisect 범위 조회로 처리하고,
+    유지 시간/대상 조건은 범위 안의 효과에만 적용합니다.
+    파싱 결과는 스킬 텍스트 해시별로 캐시합니다.
+    """
+    PARSE_CACHE_SIZE = 4096
+
+    def __init__(self):
+        # effect_id -> (slot, skill_key, Effect)
+        self.effects = {}
+        self.next_id = 0
+        # (slot, skill_key) -> [effect_id]
+        self.doc_effects = {}
+        # (stat, direction) -> 정렬된 [(value, effect_id)] (수치 없는 효과는 -1)
+        self.by_stat = defaultdict(list)
+        # 텍스트 해시 -> [Effect]
+        self.parse_cache = OrderedDict()
+
+    def parse_cached(self, text):
+        key = text_hash(text)
+        effects = self.parse_cache.get(key)
+        if effects is None:
+            effects = parse_effects(text)
+            self.parse_cache[key] = effects
+            while len(self.parse_cache) > self.PARSE_CACHE_SIZE: self.parse_cache.popitem(last=False)
+        else:
+            self.parse_cache.move_to_end(key)
+        return effects
+
+    def update(self, slot, skill_key, text):
+        """(slot, 스킬)의 효과를 다시 색인합니다."""
+        self.remove(slot, skill_key)
+        ids = []
+        for eff in self.parse_cached(text):
+            eid = self.next_id
+            self.next_id += 1
+            self.effects[eid] = (slot, skill_key, eff)
+            bisect.insort(self.by_stat[(eff.stat, eff.direction)], (eff.value if eff.value is not None else -1.0, eid))
+            ids.append(eid)
+        if ids: self.doc_effects[(slot, skill_key)] = ids
+
+    def remove(self, slot, skill_key):
+        for eid in self.doc_effects.pop((slot, skill_key), ()):
+            _, _, eff = self.effects.pop(eid)
+            postings = self.by_stat[(eff.stat, eff.direction)]
+            entry = (eff.value if eff.value is not None else -1.0, eid)
+            i = bisect.bisect_left(postings, entry)
+            if i < len(postings) and postings[i] == entry: del postings[i]
+            if not postings: del self.by_stat[(eff.stat, eff.direction)]
+
+    def find(self, stat, direction="", min_value=None, max_value=None, unit=None,
+             min_duration=None, max_duration=None, target="", skill_keys=None):
+        """
+        조건에 맞는 (slot, skill_key, Effect) 목록.
+        stat은 부분 일치 ("공격력" -> "시전자 기준 공격력" 포함), direction이 비어 있으면 방향 무관.
+        unit이 주어지면 같은 단위의 효과만 (None = 단위 무관, "" = 고정 수치)
+        """
+        lo = -1.0 if min_value is None else min_value
+        hi = float("inf") if max_value is None else max_value
+        keys = [(s, d) for s, d in self.by_stat if stat in s and (not direction or d == direction)]
+        found = []
+        for key in keys:
+            postings = self.by_stat[key]
+            # 수치 범위: 정렬 리스트에서 bisect로 구간만 조회
+            start = bisect.bisect_left(postings, (lo, -1))
+            end = bisect.bisect_right(postings, (hi, float("inf")))
+            for value, eid in postings[start:end]:
+                slot, sk_key, eff = self.effects[eid]
+                if min_value is not None and eff.value is None: continue
+                if unit is not None and eff.unit != unit: continue
+                if skill_keys and sk_key not in skill_keys: continue
+                if min_duration is not None and (eff.duration is None or eff.duration < min_duration): continue
+                if max_duration is not None and (eff.duration is None or eff.duration > max_duration): continue
+                if target and target not in eff.target: continue
+                found.append((slot, sk_key, eff))
+        return found
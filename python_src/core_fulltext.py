@@ -0,0 +1,114 @@
+# core_fulltext.py
+import re
+import sys
+from collections import defaultdict
+
+# 문장 검색어 분리: "따옴표 구문" 또는 공백 단위 단어
+_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+def normalize_text(text):
+    """
+    공백을 제거하고 소문자화한 본문을 반환합니다.
+    한국어는 띄어쓰기가 일정하지 않으므로 "재장전 속도" / "재장전속도"를 같은 문장으로 취급합니다.
+    """
+    chars = []
+    for ch in text or "":
+        if ch.isspace(): continue
+        low = ch.lower()
+        chars.append(low if len(low) == 1 else ch)
+    return "".join(chars)
+
+def split_terms(query):
+    """검색어를 단어/구문 목록으로 분리 (따옴표로 묶인 부분은 하나의 구문)"""
+    return [a or b for a, b in _TERM_RE.findall(query or "")]
+
+class FullTextIndex:
+    """
+    글자 2-gram / 3-gram 위치 역색인.
+    문서(doc)는 임의의 hashable 키이며, 구문 검색은 3-gram 위치가 연속으로 맞물리는지로 검증합니다.
+    (겹치는 3-gram이 모두 같은 시작점을 가리키면 구문 전체가 일치)
+    """
+    GRAM_SIZES = (2, 3)
+
+    def __init__(self):
+        # gram -> { doc: [시작 위치, ...] }
+        self.postings = defaultdict(dict)
+        # doc -> (원문, 정규화 본문)
+        self.docs = {}
+
+    def update(self, doc, text):
+        """문서 본문을 (재)색인합니다. 내용이 같으면 아무것도 하지 않고 False를 반환합니다."""
+        text = text or ""
+        old = self.docs.get(doc)
+        if old is not None and old[0] == text: return False
+        if old is not None: self.remove(doc)
+        if not text: return old is not None
+
+        norm = normalize_text(text)
+        self.docs[doc] = (text, norm)
+        for n in self.GRAM_SIZES:
+            positions = defaultdict(list)
+            for i in range(len(norm) - n + 1):
+                positions[norm[i:i + n]].append(i)
+            for gram, pos in positions.items():
+                self.postings[gram][doc] = pos
+        return True
+
+    def remove(self, doc):
+        entry = self.docs.pop(doc, None)
+        if entry is None: return
+        norm = entry[1]
+        for n in self.GRAM_SIZES:
+            for gram in {norm[i:i + n] for i in range(len(norm) - n + 1)}:
+                docs = self.postings.get(gram)
+                if docs is None: continue
+                docs.pop(doc, None)
+                if not docs: del self.postings[gram]
+
+    def find(self, phrase):
+        """구문이 등장하는 문서와 (정규화 본문 기준) 시작 위치: { doc: [start, ...] }"""
+        q = normalize_text(phrase)
+        if not q: return {}
+
+        if len(q) == 1:
+            # 1글자는 gram이 없으므로 본문 직접 확인 (문서 수가 적어 충분히 빠름)
+            hits = {}
+            for doc, (_, norm) in self.docs.items():
+                starts = [i for i, ch in enumerate(norm) if ch == q]
+                if starts: hits[doc] = starts
+            return hits
+
+        if len(q) == 2:
+            return {doc: list(pos) for doc, pos in self.postings.get(q, {}).items()}
+
+        # 쿼리 안의 (offset, 3-gram)을 포스팅이 짧은 순서로 정렬 → 후보 문서를 빨리 좁힘
+        grams = sorted(((i, q[i:i + 3]) for i in range(len(q) - 2)),
+                       key=lambda x: len(self.postings.get(x[1], ())))
+        first_off, first_gram = grams[0]
+        hits = {}
+        for doc, pos in self.postings.get(first_gram, {}).items():
+            starts = {p - first_off for p in pos}
+            for off, gram in grams[1:]:
+                other = self.postings[gram].get(doc) if gram in self.postings else None
+                if not other:
+                    starts = None
+                    break
+                starts &= {p - off for p in other}
+                if not starts: break
+            if starts: hits[doc] = sorted(starts)
+        return hits
+
+    def memory_by(self, group):
+        """
+        문서 그룹별 대략적인 메모리 사용량 (bytes): { group(doc): 크기 }
+        본문/정규화 본문과, 해당 문서의 포스팅(위치 목록 + dict 항목)을 합산합니다.
+        """
+        sizes = defaultdict(int)
+        for doc, (text, norm) in self.docs.items():
+            sizes[group(doc)] += sys.getsizeof(text) + sys.getsizeof(norm)
+        # dict 항목 1개: 해시 + 키/값 포인터
+        entry = 3 * 8
+        for docs in self.postings.values():
+            for doc, pos in docs.items():
+                sizes[group(doc)] += sys.getsizeof(pos) + entry
+        return dict(sizes)
@@ -0,0 +1,81 @@
+# core_fuzzy.py
+import re
+from core_utils import decompose_jamo, normalize_search_key
+
+# 이름 별칭 분리 기준: "루피 : 윈터 쇼퍼\n(2022년 크리스마스)" -> 루피 / 윈터쇼퍼 / 2022년크리스마스
+_ALIAS_SPLIT_RE = re.compile(r'[:()\[\]\n]')
+
+def name_aliases(name):
+    """이름 전체와 구분자로 나눈 각 부분의 정규화 키"""
+    aliases = [normalize_search_key(name)]
+    for part in _ALIAS_SPLIT_RE.split(name or ""):
+        key = normalize_search_key(part.strip())
+        if key and key not in aliases: aliases.append(key)
+    return [a for a in aliases if a]
+
+def levenshtein(a, b):
+    """편집 거리 (삽입/삭제/치환 1)"""
+    if len(a) < len(b): a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+def default_max_distance(jamo_len):
+    """자모 길이에 따른 허용 편집 거리 (짧은 검색어일수록 엄격)"""
+    if jamo_len <= 4: return 1
+    if jamo_len <= 10: return 2
+    return 3
+
+class BKTree:
+    """
+    자모 문자열 BK-tree. 노드는 [key, slot 집합, {거리: 자식 노드}].
+    삼각 부등식으로 |d(q, node) - d(node, child)| <= 허용 거리인 자식만 방문하므로
+    전체 이름 수보다 훨씬 적은 노드만 비교합니다.
+    삭제는 slot 집합에서만 제거하고 노드는 남겨둡니다. (빈 노드는 결과에서 제외)
+    """
+    def __init__(self):
+        self.root = None
+
+    def add(self, key, slot):
+        if self.root is None:
+            self.root = [key, {slot}, {}]
+            return
+        node = self.root
+        while True:
+            if node[0] == key:
+                node[1].add(slot)
+                return
+            d = levenshtein(key, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, {slot}, {}]
+                return
+            node = child
+
+    def discard(self, key, slot):
+        node = self.root
+        while node is not None:
+            if node[0] == key:
+                node[1].discard(slot)
+                return
+            node = node[2].get(levenshtein(key, node[0]))
+
+    def search(self, key, max_dist):
+        """허용 거리 이내의 (거리, key, slot 집합) 목록"""
+        if self.root is None: return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = levenshtein(key, node[0])
+            if d <= max_dist and node[1]: found.append((d, node[0], node[1]))
+            for cd, child in node[2].items():
+                if d - max_dist <= cd <= d + max_dist: stack.append(child)
+        return found
+
+def jamo_key(text):
+    return decompose_jamo(normalize_search_key(text))
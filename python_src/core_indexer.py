@@ -1,89 +1,909 @@
 # core_indexer.py
-from collections import defaultdict
+import heapq
+import math
+import sys
+from collections import defaultdict, OrderedDict
+from core_utils import get_chosung, normalize_search_key, has_chosung, decompose_jamo
+from core_fulltext import FullTextIndex, split_terms
+from core_tagger import TagMatcher, TextLayout, skill_text, tag_keyword
+from core_effects import EffectIndex, parse_effect_query
+from core_fuzzy import BKTree, name_aliases, jamo_key, default_max_distance
+
+# 인덱싱 대상 스킬 (정밀 검색 단위)
+SKILL_KEYS = ("skill1", "skill2", "burst")
+# 속성 필터(facet) 인덱싱 대상 필드
+FACET_FIELDS = ("company", "weapon", "burst_type", "role", "code")
+# 전문(full-text) 검색 대상: (스킬, 필드)
+TEXT_SKILL_KEYS = ("normal",) + SKILL_KEYS
+TEXT_PARTS = ("name", "desc")
+
+def _weapon_info_text(char):
+    """무기 정보: 무기 종류(이름) + weapon_info 값들 (이름/장탄/재장전/타입 등)"""
+    info = char.get("weapon_info") or {}
+    values = info.values() if isinstance(info, dict) else [info]
+    return " ".join(str(v) for v in [char.get("weapon", "")] + list(values) if v not in (None, ""))
+
+def _raw_tag_spans(text, tags):
+    """태그 문자열 그대로의 등장 위치 { tag: [(start, end), ...] } (키워드가 빈 태그 하이라이트용)"""
+    spans = {}
+    for tag in tags:
+        if not tag: continue
+        i = text.find(tag)
+        while i != -1:
+            spans.setdefault(tag, []).append((i, i + len(tag)))
+            i = text.find(tag, i + len(tag))
+    return spans
+
+def _build_text(char):
+    """육성/빌드 정보: 편집 탭의 종합 랭크, 스킬 순서, 추천 빌드/큐브, 오버로드 우선순위/옵션/메모"""
+    sp = char.get("skill_priority") or {}
+    ol = char.get("overload") or {}
+    parts = [sp.get("global_rank"), sp.get("order"), ol.get("priority"), ol.get("notes")]
+    parts += list(char.get("build_patterns") or []) + list(ol.get("recommended_cubes") or []) + list(ol.get("options") or [])
+    return " ".join(str(p) for p in parts if p)
+
+# 스킬 외 전문 검색 필드: field -> 텍스트 추출 함수 (doc = (slot, field))
+FIELD_TEXTS = {"weapon_info": _weapon_info_text, "build": _build_text}
+# 필드 지정 검색이 가능한 전체 필드 (normal:장탄 / burst:도발 / build:베어)
+SCOPED_FIELDS = TEXT_SKILL_KEYS + tuple(FIELD_TEXTS)
+
+# BM25 관련도 정렬: 필드별 가중치 (버스트 > 스킬2 > 스킬1 > 일반 공격, 스킬 이름 > 설명)
+TEXT_SKILL_WEIGHTS = {"normal": 0.5, "skill1": 1.0, "skill2": 1.2, "burst": 1.5}
+TEXT_PART_WEIGHTS = {"name": 2.0, "desc": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def popcount(mask):
+    """비트마스크에 포함된 니케 수"""
+    return bin(mask).count("1")
+
+def iter_bits(mask):
+    """비트마스크에서 켜진 slot 번호를 낮은 순서대로 반환"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# ----------------------------------------------------------------------
+# 비트 슬라이스 카운터: 니케별 일치 수를 비트 자리별 비트마스크(planes[i] = 2^i 자리)로 보관
+# 태그 하나를 더할 때 슬롯마다 반복하지 않고 big-int 반가산기 연산 몇 번으로 전체를 갱신합니다.
+# ----------------------------------------------------------------------
+def slice_add(planes, mask):
+    """카운터에 mask의 니케들을 1씩 더함 (planes 직접 수정)"""
+    carry = mask
+    for i, plane in enumerate(planes):
+        if not carry: return
+        planes[i] = plane ^ carry
+        carry &= plane
+    if carry: planes.append(carry)
+
+def slice_at_least(planes, k, universe):
+    """카운터 값이 k 이상인 니케 비트마스크 (상위 비트부터 k와 비교)"""
+    if k <= 0: return universe
+    if k.bit_length() > len(planes): return 0
+    greater, equal = 0, universe
+    for i in range(len(planes) - 1, -1, -1):
+        plane = planes[i]
+        if (k >> i) & 1: equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane
+    return greater | equal
+
+def slice_count(planes, slot):
+    """slot의 카운터 값"""
+    return sum(((plane >> slot) & 1) << i for i, plane in enumerate(planes))
+
+class QueryCache:
+    """
+    검색 결과 LRU 캐시.
+    키는 정규화된 쿼리(query_key), 값은 저장 당시의 인덱스 version과 함께 보관하며
+    version이 바뀌면(데이터 변경) 전체를 비웁니다.
+    """
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, version, value):
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        """튜닝용 통계: 크기 / 용량 / 적중 / 미스 / 적중률 (EXPLAIN 쿼리 결과에 표시)"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries), "capacity": self.capacity,
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
 
 class TagIndexer:
+    """
+    비트셋 기반 태그 검색 엔진.
+    니케마다 정수 slot을 부여하고, 태그별 역색인을 int 비트마스크로 보관하여
+    AND/OR/NOT 검색을 몇 번의 big-int 연산으로 처리합니다.
+    """
     def __init__(self):
-        # char_name -> set of tags
-        self.char_to_tags = defaultdict(set)
-        # tag -> set of char_names (역색인)
-        self.tag_to_chars = defaultdict(set)
-        
-        # 정밀 검색용 (스킬 단위 인덱스)
-        # char_name -> { 'skill1': set(), 'skill2': set(), 'burst': set() }
-        self.char_skill_tags = defaultdict(lambda: defaultdict(set))
-
-    def build_index(self, database):
-        """데이터베이스를 기반으로 인덱스를 생성합니다."""
-        self.char_to_tags.clear()
-        self.tag_to_chars.clear()
+        # char_name -> slot (비트 위치)
+        self.slot_of = {}
+        # slot -> char_name / 원본 데이터 (slot 순서 = DB 추가 순서, 삭제된 slot은 None)
+        self.slot_names = []
+        self.slot_chars = []
+        # 인덱싱된 전체 니케 비트마스크
+        self.all_mask = 0
+
+        # tag -> 비트마스크 (캐릭터 전체 기준 역색인)
+        self.tag_bits = defaultdict(int)
+        # 정밀 검색용 (스킬 단위 역색인)
+        # skill_key -> { tag -> 비트마스크 }
+        self.skill_tag_bits = {k: defaultdict(int) for k in SKILL_KEYS}
+
+        # 정방향 색인: char_name -> { 'skill1': set(), 'skill2': set(), 'burst': set() }
+        self.char_skill_tags = {}
+
+        # 효과 블록(줄/문장) 단위 위치 색인 (캐릭터 > 스킬 > 효과 블록 중 가장 세밀한 단위)
+        # tag -> { (slot, skill_key, block): [토큰 위치, ...] }
+        self.block_postings = defaultdict(dict)
+        # (slot, skill_key) -> { tag: [(block, 토큰 위치, start, end), ...] } (start/end는 skill_text 기준)
+        self.skill_tag_spans = {}
+
+        # 이름 검색용: slot -> (정규화 키, 초성 키), 1~2글자 gram -> 비트마스크
+        self.slot_name_keys = []
+        self.name_grams = defaultdict(int)
+        self.chosung_grams = defaultdict(int)
+        # 조합 중인 마지막 글자 검색용 자모 색인: slot -> (자모 키, 글자별 자모 시작 위치), 자모 1~2gram -> 비트마스크
+        self.slot_jamo = []
+        self.jamo_grams = defaultdict(int)
+        # 직전 이름 검색 (version, within, 자모 키, 결과): 이어서 입력하면 직전 결과 안에서만 검증
+        self._last_name_search = None
+        # 오타 허용 이름 검색: 이름/별칭의 자모 키 BK-tree, slot -> [자모 키]
+        self.name_tree = BKTree()
+        self.slot_aliases = []
+
+        # 속성 필터용: field -> { value -> 비트마스크 }, slot -> { field: value }
+        self.facet_bits = {f: defaultdict(int) for f in FACET_FIELDS}
+        self.slot_facets = []
+
+        # 스킬 이름/설명 전문 검색용 n-gram 위치 역색인 (doc = (slot, skill_key, part))
+        self.text_index = FullTextIndex()
+        # 스킬 외 필드(무기 정보/빌드) 전문 색인 (doc = (slot, field))
+        self.field_index = FullTextIndex()
+        # 스킬 설명의 [효과 수치] 색인 (stat/방향별 정렬 리스트, 범위 검색용)
+        self.effect_index = EffectIndex()
+
+        # 인덱스 변경 카운터: 모든 변경 연산에서 증가 (검색 결과 캐시 무효화 기준)
+        self.version = 0
+        self.query_cache = QueryCache()
+        # BM25용 필드별 평균 길이 (version이 바뀔 때만 재계산)
+        self._field_len_cache = (None, {})
+
+    def build_index(self, database, tag_spans=None):
+        """
+        데이터베이스를 기반으로 인덱스를 생성합니다.
+        tag_spans: 태깅 시 얻은 일치 위치 { 이름: { 스킬: { tag: [(start, end), ...] } } } (없으면 태그 위치를 다시 매칭)
+        """
+        self.slot_of.clear()
+        self.slot_names = []
+        self.slot_chars = []
+        self.all_mask = 0
+        self.tag_bits.clear()
+        for bits in self.skill_tag_bits.values(): bits.clear()
         self.char_skill_tags.clear()
+        self.block_postings.clear()
+        self.skill_tag_spans = {}
+        self.slot_name_keys = []
+        self.name_grams.clear()
+        self.chosung_grams.clear()
+        self.slot_jamo = []
+        self.jamo_grams.clear()
+        self.name_tree = BKTree()
+        self.slot_aliases = []
+        for bits in self.facet_bits.values(): bits.clear()
+        self.slot_facets = []
+        self.text_index = FullTextIndex()
+        self.field_index = FullTextIndex()
+        # 효과 파싱 결과 캐시(텍스트 해시 기준)는 재생성 후에도 재사용
+        parse_cache = self.effect_index.parse_cache
+        self.effect_index = EffectIndex()
+        self.effect_index.parse_cache = parse_cache
+        self.version += 1
 
         for char in database:
             name = char.get("nikke_name")
             if not name: continue
 
+            bit = 1 << self._alloc_slot(name, char)
+
             skills = char.get("skills", {})
-            all_tags_for_char = set()
+            skill_map = self.char_skill_tags.setdefault(name, {k: set() for k in SKILL_KEYS})
 
-            for sk_key in ["skill1", "skill2", "burst"]:
+            for sk_key in SKILL_KEYS:
                 skill_data = skills.get(sk_key, {})
                 tags = set(skill_data.get("tags", []))
-                
-                # 스킬별 태그 저장
-                self.char_skill_tags[name][sk_key] = tags
-                
-                # 캐릭터 전체 태그 통합
-                all_tags_for_char.update(tags)
-
-            self.char_to_tags[name] = all_tags_for_char
-            
-            # 역색인 구성
-            for t in all_tags_for_char:
-                self.tag_to_chars[t].add(name)
+                skill_map[sk_key] |= tags
 
-    def search(self, tags_and, tags_or, tags_not, strict_mode=False):
+                # 스킬별 역색인 / 캐릭터 전체 역색인 동시 구성
+                sk_bits = self.skill_tag_bits[sk_key]
+                for t in tags:
+                    sk_bits[t] |= bit
+                    self.tag_bits[t] |= bit
+                found = ((tag_spans or {}).get(name) or {}).get(sk_key)
+                self._index_blocks(bit.bit_length() - 1, sk_key, skill_data, tags, found)
+
+    # ------------------------------------------------------------------
+    # 증분 갱신 (니케 1명 단위)
+    # ------------------------------------------------------------------
+    def _alloc_slot(self, name, char):
+        slot = self.slot_of.get(name)
+        if slot is not None:
+            self.slot_chars[slot] = char
+            self.refresh_character(char)
+            return slot
+        # 삭제된 slot은 재사용하지 않음 (결과를 slot 순서로 나열하면 DB 순서와 같도록)
+        slot = len(self.slot_names)
+        self.slot_names.append(name)
+        self.slot_chars.append(char)
+        self.slot_name_keys.append(None)
+        self.slot_jamo.append(None)
+        self.slot_aliases.append([])
+        self.slot_facets.append({})
+        self.slot_of[name] = slot
+        self.all_mask |= 1 << slot
+        self._index_name(slot, name)
+        self.refresh_character(char)
+        return slot
+
+    @staticmethod
+    def _grams(key):
+        grams = set(key)
+        grams.update(key[i:i + 2] for i in range(len(key) - 1))
+        return grams
+
+    def _index_name(self, slot, name):
+        norm = normalize_search_key(name)
+        cho = get_chosung(norm)
+        self.slot_name_keys[slot] = (norm, cho)
+        bit = 1 << slot
+        for g in self._grams(norm): self.name_grams[g] |= bit
+        for g in self._grams(cho): self.chosung_grams[g] |= bit
+        starts, parts = [], []
+        pos = 0
+        for ch in norm:
+            starts.append(pos)
+            parts.append(decompose_jamo(ch))
+            pos += len(parts[-1])
+        starts.append(pos)
+        jamo = "".join(parts)
+        self.slot_jamo[slot] = (jamo, starts)
+        for g in self._grams(jamo): self.jamo_grams[g] |= bit
+        self.slot_aliases[slot] = [jamo_key(a) for a in name_aliases(name)]
+        for key in self.slot_aliases[slot]: self.name_tree.add(key, slot)
+
+    def _unindex_name(self, slot):
+        keys = self.slot_name_keys[slot]
+        if not keys: return
+        bit = 1 << slot
+        for g in self._grams(keys[0]): self._clear_bit(self.name_grams, g, bit)
+        for g in self._grams(keys[1]): self._clear_bit(self.chosung_grams, g, bit)
+        self.slot_name_keys[slot] = None
+        for g in self._grams(self.slot_jamo[slot][0]): self._clear_bit(self.jamo_grams, g, bit)
+        self.slot_jamo[slot] = None
+        for key in self.slot_aliases[slot]: self.name_tree.discard(key, slot)
+        self.slot_aliases[slot] = []
+
+    def refresh_character(self, char):
+        """태그 외 색인(속성 facet, 스킬 전문, 무기/빌드 필드)을 현재 데이터에 맞춰 변경분만 갱신"""
+        self.update_attributes(char)
+        self.update_texts(char)
+        self.update_fields(char)
+
+    def update_texts(self, char):
+        """스킬 이름/설명 전문 색인 갱신 (내용이 바뀐 필드만 재색인)"""
+        slot = self.slot_of.get(char.get("nikke_name"))
+        if slot is None: return
+        skills = char.get("skills") or {}
+        for sk_key in TEXT_SKILL_KEYS:
+            skill = skills.get(sk_key) or {}
+            for part in TEXT_PARTS:
+                if self.text_index.update((slot, sk_key, part), skill.get(part, "")):
+                    self.version += 1
+                    if part == "desc": self.effect_index.update(slot, sk_key, skill.get("desc", ""))
+
+    def update_fields(self, char):
+        """무기 정보/빌드 필드 전문 색인 갱신 (내용이 바뀐 필드만 재색인)"""
+        slot = self.slot_of.get(char.get("nikke_name"))
+        if slot is None: return
+        for field, extract in FIELD_TEXTS.items():
+            if self.field_index.update((slot, field), extract(char)): self.version += 1
+
+    def update_attributes(self, char):
+        """니케의 속성(제조사/무기/버스트/역할/코드) 값이 바뀐 필드만 facet 포스팅 갱신"""
+        slot = self.slot_of.get(char.get("nikke_name"))
+        if slot is None: return
+        bit = 1 << slot
+        current = self.slot_facets[slot]
+        for field in FACET_FIELDS:
+            value = char.get(field)
+            if field in current and current[field] == value: continue
+            if field in current: self._clear_bit(self.facet_bits[field], current[field], bit)
+            self.facet_bits[field][value] |= bit
+            current[field] = value
+            self.version += 1
+
+    @staticmethod
+    def _clear_bit(bits_map, tag, bit):
+        m = bits_map.get(tag, 0) & ~bit
+        if m: bits_map[tag] = m
+        else: bits_map.pop(tag, None)
+
+    def tags_of(self, name):
+        """해당 니케가 가진 전체 태그 (스킬 통합)"""
+        skill_map = self.char_skill_tags.get(name)
+        if not skill_map: return set()
+        return set().union(*skill_map.values())
+
+    def upsert_character(self, char, tag_spans=None):
+        """니케 1명의 태그를 다시 읽어 변경된 포스팅만 갱신합니다. (tag_spans: 스킬별 태깅 일치 위치)"""
+        name = char.get("nikke_name")
+        if not name: return
+        bit = 1 << self._alloc_slot(name, char)
+
+        skills = char.get("skills") or {}
+        old_map = self.char_skill_tags.get(name) or {k: set() for k in SKILL_KEYS}
+        new_map = {k: set((skills.get(k) or {}).get("tags", [])) for k in SKILL_KEYS}
+
+        for sk_key in SKILL_KEYS:
+            sk_bits = self.skill_tag_bits[sk_key]
+            for t in old_map[sk_key] - new_map[sk_key]: self._clear_bit(sk_bits, t, bit)
+            for t in new_map[sk_key] - old_map[sk_key]: sk_bits[t] |= bit
+
+        old_all = set().union(*old_map.values())
+        new_all = set().union(*new_map.values())
+        for t in old_all - new_all: self._clear_bit(self.tag_bits, t, bit)
+        for t in new_all - old_all: self.tag_bits[t] |= bit
+
+        self.char_skill_tags[name] = new_map
+        slot = bit.bit_length() - 1
+        for sk_key in SKILL_KEYS:
+            self._index_blocks(slot, sk_key, skills.get(sk_key) or {}, new_map[sk_key], (tag_spans or {}).get(sk_key))
+        self.version += 1
+
+    def _index_blocks(self, slot, sk_key, skill, tags, found=None):
         """
-        태그 조건에 맞는 니케 이름의 집합(Set)을 반환합니다.
-        strict_mode=True일 경우, '단일 스킬 내'에서 AND 조건을 만족해야 합니다.
+        태그 일치 위치(found: 태깅 결과, 없으면 다시 매칭)로 효과 블록/토큰 위치 포스팅을 갱신.
+        키워드가 빈 태그(길이 0 일치)는 위치가 없으므로 제외합니다.
+        """
+        self._unindex_blocks(slot, sk_key)
+        if not tags: return
+        text = skill_text(skill)
+        if found is None: found = TagMatcher(tags).find_spans(text)
+        layout = TextLayout(text, len(skill.get("name", "")))
+        spans = {}
+        for tag in tags:
+            entries = [(layout.block_of(s), layout.token_of(s), s, e) for s, e in found.get(tag, ()) if s < e]
+            if not entries: continue
+            spans[tag] = entries
+            postings = self.block_postings[tag]
+            for block, token, _, _ in entries:
+                postings.setdefault((slot, sk_key, block), []).append(token)
+        if spans: self.skill_tag_spans[(slot, sk_key)] = spans
+
+    def match_spans(self, name, sk_key, tags, skill):
+        """
+        상세 화면 하이라이트/일치 설명용: 스킬 설명(desc) 기준 태그 일치 구간 { tag: [(start, end), ...] }
+        태깅 시 얻어 색인에 저장한 위치를 그대로 쓰고, 색인 대상이 아닌 스킬(일반 공격)이나
+        저장 후 본문이 바뀐 태그만 해당 태그로 다시 매칭합니다.
+        키워드가 빈 태그(예: "▲")는 태그 문자열 그대로의 등장 위치를 표시합니다.
+        """
+        desc = skill.get("desc", "")
+        result = _raw_tag_spans(desc, [t for t in tags if not tag_keyword(t)])
+        tags = [t for t in tags if tag_keyword(t)]
+        head = len(skill.get("name", "")) + 1
+        slot = self.slot_of.get(name)
+        if slot is None or sk_key not in SKILL_KEYS:
+            if tags: result.update(TagMatcher(tags).find_spans(desc))
+            return result
+        stored = self.skill_tag_spans.get((slot, sk_key), {})
+        stale = []
+        for tag in tags:
+            entries = stored.get(tag)
+            if not entries: continue
+            kw = tag_keyword(tag).lower()
+            spans = [(start - head, end - head) for _, _, start, end in entries if start >= head]
+            if any(desc[a:b].lower() != kw for a, b in spans): stale.append(tag)
+            elif spans: result[tag] = spans
+        if stale: result.update(TagMatcher(stale).find_spans(desc))
+        return result
+
+    def _unindex_blocks(self, slot, sk_key):
+        for tag, entries in self.skill_tag_spans.pop((slot, sk_key), {}).items():
+            postings = self.block_postings.get(tag)
+            if postings is None: continue
+            for block, _, _, _ in entries: postings.pop((slot, sk_key, block), None)
+            if not postings: del self.block_postings[tag]
+
+    def remove_character(self, name):
+        """니케 1명을 인덱스에서 제거하고 slot을 비웁니다."""
+        slot = self.slot_of.pop(name, None)
+        if slot is None: return
+        bit = 1 << slot
+        skill_map = self.char_skill_tags.pop(name, {})
+        for sk_key, tags in skill_map.items():
+            for t in tags: self._clear_bit(self.skill_tag_bits[sk_key], t, bit)
+        all_tags = set().union(*skill_map.values()) if skill_map else set()
+        for t in all_tags: self._clear_bit(self.tag_bits, t, bit)
+
+        for sk_key in SKILL_KEYS: self._unindex_blocks(slot, sk_key)
+        self._unindex_name(slot)
+        for field, value in self.slot_facets[slot].items():
+            self._clear_bit(self.facet_bits[field], value, bit)
+        self.slot_facets[slot] = {}
+        for sk_key in TEXT_SKILL_KEYS:
+            for part in TEXT_PARTS: self.text_index.remove((slot, sk_key, part))
+            self.effect_index.remove(slot, sk_key)
+        for field in FIELD_TEXTS: self.field_index.remove((slot, field))
+        self.all_mask &= ~bit
+        self.slot_names[slot] = None
+        self.slot_chars[slot] = None
+        self.version += 1
+
+    def rename_character(self, old_name, new_name):
+        """slot은 유지한 채 이름만 변경합니다. (포스팅 변경 없음)"""
+        if old_name == new_name: return True
+        if old_name not in self.slot_of or new_name in self.slot_of: return False
+        slot = self.slot_of.pop(old_name)
+        self.slot_of[new_name] = slot
+        self.slot_names[slot] = new_name
+        self._unindex_name(slot)
+        self._index_name(slot, new_name)
+        if old_name in self.char_skill_tags:
+            self.char_skill_tags[new_name] = self.char_skill_tags.pop(old_name)
+        self.version += 1
+        return True
+
+    def drop_tag(self, tag):
+        """태그 자체가 삭제되었을 때 해당 포스팅을 제거하고, 영향받은 니케 이름을 반환합니다."""
+        affected = self.names_from_mask(self.tag_bits.pop(tag, 0))
+        for sk_bits in self.skill_tag_bits.values(): sk_bits.pop(tag, None)
+        for name in affected:
+            for tags in self.char_skill_tags[name].values(): tags.discard(tag)
+        self.block_postings.pop(tag, None)
+        for spans in self.skill_tag_spans.values(): spans.pop(tag, None)
+        self.version += 1
+        return affected
+
+    # ------------------------------------------------------------------
+    # 비트마스크 <-> 이름 변환
+    # ------------------------------------------------------------------
+    def names_from_mask(self, mask):
+        return {self.slot_names[s] for s in iter_bits(mask)}
+
+    @staticmethod
+    def mask_from_slots(slots):
+        mask = 0
+        for s in slots: mask |= 1 << s
+        return mask
+
+    def chars_from_mask(self, mask):
+        """비트마스크의 니케 데이터를 slot(DB) 순서대로 반환"""
+        return [self.slot_chars[s] for s in iter_bits(mask)]
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+    def _gram_candidates(self, grams_map, key, within):
+        if len(key) == 1: return grams_map.get(key, 0) & within
+        mask = within
+        for i in range(len(key) - 1):
+            mask &= grams_map.get(key[i:i + 2], 0)
+            if not mask: break
+        return mask
+
+    @staticmethod
+    def query_key(tags_and, tags_or, tags_not, strict_mode, filters, text, text_mode=False, ranked=False, structured=None, min_match=None):
+        """
+        검색 결과 캐시용 정규화 키 (태그 순서/검색어 공백·대소문자 차이를 무시).
+        쿼리 문법 검색이면 structured(정규화된 AST)를 검색어 대신 사용합니다.
+        검색 범위(strict_mode)는 AND 태그가 없어도 조건부 태그 수(refine_counts)가 달라지므로 항상 키에 포함합니다.
+        """
+        if structured is not None: text, text_mode, ranked = structured, False, False
+        # 스킬 설명 검색은 따옴표 구문 구분이 있으므로 단어 목록도 키에 포함
+        terms = tuple(normalize_search_key(t) for t in split_terms(text)) if text_mode else None
+        return (
+            tuple(sorted(set(tags_and or ()))), tuple(sorted(set(tags_or or ()))),
+            tuple(sorted(set(tags_not or ()))), strict_mode or False,
+            tuple(sorted((filters or {}).items())),
+            text if structured is not None else normalize_search_key(text or ""), terms, bool(ranked),
+            (min_match or None) if tags_and else None,
+        )
+
+    def search_name(self, term, within=None):
+        """
+        match_search()와 같은 규칙(부분 문자열 / 초성)으로 이름을 검색해 비트마스크를 반환합니다.
+        bigram 포스팅으로 후보를 좁힌 뒤, 미리 계산된 키로 후보만 검증합니다.
+        within이 주어지면 그 후보 안에서만 검증합니다.
+
+        마지막 글자는 조합 중일 수 있으므로 자모 접두어로도 비교합니다. ("레드ㅎ", "레드훋" -> 레드 후드)
+        직전 검색어의 자모 키가 현재 검색어의 접두어이면 직전 결과 안에서만 검증합니다.
+        """
+        if within is None: within = self.all_mask
+        t = normalize_search_key(term)
+        if not t: return within
+
+        jamo = decompose_jamo(t)
+        last = self._last_name_search
+        candidates = within
+        if last and last[0] == self.version and last[1] == within and jamo.startswith(last[2]):
+            candidates = last[3]
+
+        mask = 0
+        for slot in iter_bits(self._gram_candidates(self.name_grams, t, candidates)):
+            if t in self.slot_name_keys[slot][0]: mask |= 1 << slot
+        if has_chosung(t):
+            for slot in iter_bits(self._gram_candidates(self.chosung_grams, t, candidates) & ~mask):
+                if t in self.slot_name_keys[slot][1]: mask |= 1 << slot
+        if '가' <= t[-1] <= '힣' or 'ㄱ' <= t[-1] <= 'ㅣ':
+            mask |= self._search_partial_syllable(t[:-1], decompose_jamo(t[-1]), candidates & ~mask)
+
+        self._last_name_search = (self.version, within, jamo, mask)
+        return mask
+
+    def _search_partial_syllable(self, head, last_jamo, candidates):
+        """head(완성된 글자들) 바로 뒤에 last_jamo로 시작하는 자모가 이어지는 이름"""
+        if head: candidates = self._gram_candidates(self.name_grams, head, candidates)
+        candidates = self._gram_candidates(self.jamo_grams, last_jamo, candidates)
+        mask = 0
+        for slot in iter_bits(candidates):
+            norm = self.slot_name_keys[slot][0]
+            jamo, starts = self.slot_jamo[slot]
+            i = norm.find(head)
+            while i != -1:
+                k = i + len(head)
+                if k < len(norm) and jamo.startswith(last_jamo, starts[k]):
+                    mask |= 1 << slot
+                    break
+                i = norm.find(head, i + 1)
+        return mask
+
+    def search_name_fuzzy(self, term, within=None, max_dist=None):
+        """
+        오타 허용 이름 검색 ("래드후드" -> 레드 후드). 자모 단위 편집 거리가 max_dist 이내인
+        이름/별칭을 BK-tree로 찾아, 거리가 가까운 순서의 slot 목록을 반환합니다.
+        """
+        key = jamo_key(term)
+        if not key: return []
+        if max_dist is None: max_dist = default_max_distance(len(key))
+        if within is None: within = self.all_mask
+        best = {}
+        for d, _, slots in self.name_tree.search(key, max_dist):
+            for slot in slots:
+                if (within >> slot) & 1 and d < best.get(slot, max_dist + 1): best[slot] = d
+        return sorted(best, key=lambda slot: (best[slot], slot))
+
+    def search_text(self, query, skill_keys=None, within=None):
+        """
+        스킬 이름/설명 전문 검색 비트마스크.
+        공백으로 나뉜 단어는 모두 포함(AND), "따옴표"로 묶으면 하나의 구문으로 검색합니다.
+        """
+        if within is None: within = self.all_mask
+        terms = split_terms(query)
+        if not terms: return within
+        mask = within
+        for term in terms:
+            term_mask = 0
+            for doc in self.text_index.find(term):
+                if skill_keys and doc[1] not in skill_keys: continue
+                term_mask |= 1 << doc[0]
+            mask &= term_mask
+            if not mask: break
+        return mask
+
+    def search_field(self, field, query, within=None):
+        """
+        필드 지정 전문 검색 비트마스크 (normal:장탄 / burst:도발 / weapon_info:울프스 / build:베어).
+        스킬 필드는 해당 스킬 문서의 포스팅만, 그 외 필드는 무기/빌드 색인의 해당 필드 포스팅만 봅니다.
+        """
+        if field in TEXT_SKILL_KEYS: return self.search_text(query, (field,), within)
+        if field not in FIELD_TEXTS: raise KeyError(field)
+        if within is None: within = self.all_mask
+        mask = within
+        for term in split_terms(query):
+            term_mask = 0
+            for slot, doc_field in self.field_index.find(term):
+                if doc_field == field: term_mask |= 1 << slot
+            mask &= term_mask
+            if not mask: break
+        return mask
+
+    def field_memory(self):
+        """
+        필드별 색인 메모리 사용량 (bytes, 근사치): { field: {"text": 전문 색인, "tags": 태그 포스팅, "docs": 니케 수} }
+        어떤 필드를 색인할지 판단하기 위한 참고용입니다.
+        """
+        report = {f: {"text": 0, "tags": 0, "docs": 0} for f in SCOPED_FIELDS}
+        for sk_key, size in self.text_index.memory_by(lambda doc: doc[1]).items(): report[sk_key]["text"] += size
+        for field, size in self.field_index.memory_by(lambda doc: doc[1]).items(): report[field]["text"] += size
+        for slot, field in {doc[:2] for doc in self.text_index.docs} | set(self.field_index.docs):
+            report[field]["docs"] += 1
+        for sk_key, bits in self.skill_tag_bits.items():
+            report[sk_key]["tags"] = sum(sys.getsizeof(t) + sys.getsizeof(m) for t, m in bits.items())
+        return report
+
+    def _field_avg_lengths(self):
+        version, avg = self._field_len_cache
+        if version == self.version: return avg
+        total, count = defaultdict(int), defaultdict(int)
+        for (_, sk_key, part), (_, norm) in self.text_index.docs.items():
+            total[(sk_key, part)] += len(norm)
+            count[(sk_key, part)] += 1
+        avg = {f: total[f] / count[f] for f in total}
+        self._field_len_cache = (self.version, avg)
+        return avg
+
+    def search_effect(self, query, skill_keys=None, within=None):
+        """
+        효과 수치 조건 검색 비트마스크.
+        query: "공격력▲>=50%, 지속>=10초, 대상=아군 전체" 형식 문자열 또는 parse_effect_query() 결과
+        """
+        cond = parse_effect_query(query) if isinstance(query, str) else query
+        mask = 0
+        for slot, _, _ in self.effect_index.find(skill_keys=skill_keys, **cond):
+            mask |= 1 << slot
+        return mask if within is None else mask & within
+
+    def skill_mask(self, skill_key):
+        """해당 스킬(이름 또는 설명)이 있는 니케 비트마스크"""
+        mask = 0
+        for slot, sk_key, _ in self.text_index.docs:
+            if sk_key == skill_key: mask |= 1 << slot
+        return mask
+
+    def rank_text(self, query, mask=None, k=50):
+        """
+        스킬 이름/설명에 대한 BM25(필드 가중치 적용) 점수 상위 k명의 slot 목록을 반환합니다.
+        mask가 주어지면 해당 후보만 점수를 매기며, 전체 정렬 대신 top-k 힙을 사용합니다.
+        """
+        terms = split_terms(query)
+        if not terms: return []
+        if mask is None: mask = self.all_mask
+        n_chars = popcount(self.all_mask)
+        avg_len = self._field_avg_lengths()
+        docs = self.text_index.docs
+
+        scores = defaultdict(float)
+        for term in terms:
+            # slot -> 필드 가중치·길이 정규화를 반영한 tf
+            hits = self.text_index.find(term)
+            weighted_tf = defaultdict(float)
+            for doc, starts in hits.items():
+                slot, sk_key, part = doc
+                if not (mask >> slot) & 1: continue
+                field_len = len(docs[doc][1])
+                norm = 1 - BM25_B + BM25_B * field_len / (avg_len.get((sk_key, part)) or 1)
+                weighted_tf[slot] += TEXT_SKILL_WEIGHTS[sk_key] * TEXT_PART_WEIGHTS[part] * len(starts) / norm
+            if not weighted_tf: continue
+            # df는 후보와 무관하게 전체 니케 기준 (검색어 자체의 희소성)
+            df = len({doc[0] for doc in hits})
+            idf = math.log(1 + (n_chars - df + 0.5) / (df + 0.5))
+            for slot, tf in weighted_tf.items():
+                scores[slot] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda x: (x[1], -x[0]))
+        return [slot for slot, _ in top]
+
+    def _block_docs(self, tags, docs=None):
+        """모든 태그가 함께 등장하는 (slot, skill_key, block) 집합"""
+        for t in sorted(tags, key=lambda t: len(self.block_postings.get(t, ()))):
+            keys = self.block_postings.get(t, {}).keys()
+            docs = set(keys) if docs is None else docs & keys
+            if not docs: break
+        return docs if docs is not None else set()
+
+    def search_block(self, tags, within=None, skill_keys=None):
+        """같은 효과 블록(줄/문장) 안에 태그가 모두 등장하는 니케 비트마스크"""
+        mask = 0
+        for slot, sk_key, _ in self._block_docs(tags):
+            if not skill_keys or sk_key in skill_keys: mask |= 1 << slot
+        return mask if within is None else mask & within
+
+    def search_near(self, tag_a, tag_b, distance, within=None, skill_keys=None):
+        """같은 스킬 안에서 두 태그가 distance 토큰 이내로 등장하는 니케 비트마스크"""
+        candidates = self.tag_bits.get(tag_a, 0) & self.tag_bits.get(tag_b, 0)
+        if within is not None: candidates &= within
+        mask = 0
+        for slot in iter_bits(candidates):
+            for sk_key in skill_keys or SKILL_KEYS:
+                spans = self.skill_tag_spans.get((slot, sk_key))
+                if not spans or tag_a not in spans or tag_b not in spans: continue
+                pos_a = sorted(e[1] for e in spans[tag_a])
+                pos_b = sorted(e[1] for e in spans[tag_b])
+                # 두 정렬 리스트를 함께 훑어 최소 거리 확인
+                i = j = 0
+                while i < len(pos_a) and j < len(pos_b):
+                    if abs(pos_a[i] - pos_b[j]) <= distance:
+                        mask |= 1 << slot
+                        break
+                    if pos_a[i] < pos_b[j]: i += 1
+                    else: j += 1
+                if (mask >> slot) & 1: break
+        return mask
+
+    def _scope_postings(self, tags, strict_mode=False):
+        """
+        일치 범위별 태그 포스팅 목록: [[tag 비트마스크, ...], ...]
+        캐릭터 단위는 범위 1개, 정밀 모드는 스킬별, 효과 블록 모드는 (스킬, 블록 번호)별
+        """
+        if strict_mode == "block":
+            scopes = defaultdict(lambda: [0] * len(tags))
+            for i, t in enumerate(tags):
+                for slot, sk_key, block in self.block_postings.get(t, ()):
+                    scopes[(sk_key, block)][i] |= 1 << slot
+            return list(scopes.values())
+        if strict_mode:
+            return [[sk_bits.get(t, 0) for t in tags] for sk_bits in self.skill_tag_bits.values()]
+        return [[self.tag_bits.get(t, 0) for t in tags]]
+
+    def _match_planes(self, tags, within, strict_mode=False):
+        """범위별 일치 수 비트 슬라이스 카운터"""
+        result = []
+        for masks in self._scope_postings(tags, strict_mode):
+            planes = []
+            for m in masks:
+                if m & within: slice_add(planes, m & within)
+            if planes: result.append(planes)
+        return result
+
+    def search_threshold(self, tags, k, strict_mode=False, within=None):
+        """
+        k-of-n 검색: 태그 중 k개 이상 일치하는 니케 비트마스크.
+        strict_mode이면 한 스킬(또는 한 효과 블록) 안에서 k개 이상이어야 합니다.
+        """
+        if within is None: within = self.all_mask
+        k = min(k, len(set(tags)))
+        mask = 0
+        for planes in self._match_planes(list(set(tags)), within, strict_mode):
+            mask |= slice_at_least(planes, k, within)
+        return mask
+
+    def match_counts(self, tags, mask, strict_mode=False):
+        """결과 니케별 일치한 태그 수 { slot: 개수 } (정밀 모드는 범위 중 최대)"""
+        all_planes = self._match_planes(list(set(tags)), mask, strict_mode)
+        return {slot: max((slice_count(p, slot) for p in all_planes), default=0) for slot in iter_bits(mask)}
+
+    def rank_by_match_count(self, tags, mask, strict_mode=False):
+        """일치한 태그 수가 많은 순서의 slot 목록 (같으면 DB 순서)"""
+        counts = self.match_counts(tags, mask, strict_mode)
+        return sorted(counts, key=lambda slot: -counts[slot])
+
+    def search_mask(self, tags_and, tags_or, tags_not, strict_mode=False, min_match=None):
+        """
+        search()와 동일한 조건을 비트마스크로 반환합니다.
+        strict_mode: False(캐릭터 단위) / True(같은 스킬 안) / "block"(같은 효과 블록 안)
+        min_match: 지정하면 AND 태그 전부 대신 그중 min_match개 이상 일치 (k-of-n)
         """
         # 1. 초기 후보군 설정 (전체 니케)
-        candidates = set(self.char_to_tags.keys())
+        candidates = self.all_mask
 
-        # 2. NOT 조건 처리 (제일 먼저 제거)
-        if tags_not:
-            for t in tags_not:
-                chars_with_tag = self.tag_to_chars.get(t, set())
-                candidates -= chars_with_tag
+        # 2. NOT 조건 처리 (ANDNOT)
+        for t in tags_not or ():
+            candidates &= ~self.tag_bits.get(t, 0)
 
         # 3. AND 조건 처리
-        if tags_and:
-            if strict_mode:
-                # 정밀 모드: 한 스킬 안에 모든 AND 태그가 다 있어야 함
-                strict_candidates = set()
-                for name in candidates:
-                    skill_map = self.char_skill_tags[name]
-                    # 1, 2, 버스트 중 하나라도 AND 태그 전부를 포함하는 스킬이 있는지 확인
-                    for sk_tags in skill_map.values():
-                        if set(tags_and).issubset(sk_tags):
-                            strict_candidates.add(name)
-                            break
-                candidates &= strict_candidates
+        if tags_and and min_match:
+            candidates = self.search_threshold(tags_and, min_match, strict_mode, candidates)
+        elif tags_and:
+            if strict_mode == "block":
+                # 효과 블록 모드: 한 줄/문장 안에 AND 태그 전부
+                candidates = self.search_block(tags_and, candidates)
+            elif strict_mode:
+                # 정밀 모드: 스킬별로 AND 결과를 구한 뒤 OR (한 스킬 안에 AND 태그 전부)
+                strict_mask = 0
+                for sk_bits in self.skill_tag_bits.values():
+                    m = candidates
+                    for t in tags_and:
+                        m &= sk_bits.get(t, 0)
+                        if not m: break
+                    strict_mask |= m
+                candidates = strict_mask
             else:
                 # 일반 모드: 캐릭터가 가진 전체 태그 중에 있으면 됨
                 for t in tags_and:
-                    chars_with_tag = self.tag_to_chars.get(t, set())
-                    candidates &= chars_with_tag
+                    candidates &= self.tag_bits.get(t, 0)
+                    if not candidates: break
 
-        # 4. OR 조건 처리
-        if tags_or:
-            or_candidates = set()
+        # 4. OR 조건 처리: (AND조건들) 그리고 (OR조건들 중 하나)
+        if tags_or and candidates:
+            or_mask = 0
             for t in tags_or:
-                chars_with_tag = self.tag_to_chars.get(t, set())
-                or_candidates |= chars_with_tag
-            
-            # 기존 후보군과 OR 후보군의 교집합 (AND 조건도 만족하고 OR 조건도 만족해야 하므로)
-            # 만약 AND 조건이 없었다면 candidates는 전체였으므로 필터링 효과
-            # UI 로직상: (AND조건들) 그리고 (OR조건들 중 하나) 가 일반적임
-            candidates &= or_candidates
-
-        return candidates
\ No newline at end of file
+                or_mask |= self.tag_bits.get(t, 0)
+            candidates &= or_mask
+
+        return candidates
+
+    def refine_counts(self, result_mask, tags, tags_and=(), strict_mode=False):
+        """
+        현재 결과(result_mask)에 각 태그를 AND로 추가했을 때 남는 니케 수를 한 번에 계산합니다.
+        정밀 모드에서는 기존 AND 태그와 같은 스킬 안에 있어야 하므로 스킬별 AND 마스크를 재사용합니다.
+        """
+        counts = {}
+        if not result_mask:
+            return dict.fromkeys(tags, 0)
+        if not strict_mode:
+            for t in tags:
+                counts[t] = popcount(result_mask & self.tag_bits.get(t, 0))
+            return counts
+        if strict_mode == "block":
+            docs = {d for d in self._block_docs(tags_and) if (result_mask >> d[0]) & 1} if tags_and else None
+            for t in tags:
+                postings = self.block_postings.get(t, {})
+                m = 0
+                for d in (postings if docs is None else docs & postings.keys()):
+                    m |= 1 << d[0]
+                counts[t] = popcount(m & result_mask)
+            return counts
+
+        # 스킬별: (결과 ∩ 해당 스킬에 기존 AND 태그 전부 보유)
+        per_skill = []
+        for sk_bits in self.skill_tag_bits.values():
+            m = result_mask
+            for t in tags_and or ():
+                m &= sk_bits.get(t, 0)
+                if not m: break
+            if m: per_skill.append((m, sk_bits))
+        for t in tags:
+            m = 0
+            for base, sk_bits in per_skill:
+                m |= base & sk_bits.get(t, 0)
+            counts[t] = popcount(m)
+        return counts
+
+    def search(self, tags_and, tags_or, tags_not, strict_mode=False):
+        """
+        태그 조건에 맞는 니케 이름의 집합(Set)을 반환합니다.
+        strict_mode=True일 경우, '단일 스킬 내'에서 AND 조건을 만족해야 합니다.
+        strict_mode="block"일 경우, 같은 효과 블록(줄/문장) 안에서 AND 조건을 만족해야 합니다.
+        """
+        return self.names_from_mask(self.search_mask(tags_and, tags_or, tags_not, strict_mode))
+
+    # ------------------------------------------------------------------
+    # 속성 필터 (facet)
+    # ------------------------------------------------------------------
+    def facet_mask(self, field, value, substring=False):
+        """
+        속성값에 해당하는 니케 비트마스크.
+        substring=True이면 값이 포함된 모든 속성값을 합칩니다. (버스트 필터: "II" in "버스트 II")
+        """
+        bits = self.facet_bits[field]
+        if not substring: return bits.get(value, 0)
+        mask = 0
+        for raw, m in bits.items():
+            if raw and value in raw: mask |= m
+        return mask
+
+    def has_facet_value(self, field, value):
+        """속성값(부분 일치)이 색인에 존재하는지"""
+        return any(raw and value in raw for raw in self.facet_bits[field])
+
+    def facet_counts(self, field, base_mask, choices, substring=False):
+        """현재 후보군(base_mask)에서 각 선택지를 골랐을 때 남는 니케 수"""
+        return {c: popcount(base_mask & self.facet_mask(field, c, substring)) for c in choices}
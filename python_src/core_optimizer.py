@@ -0,0 +1,129 @@
+# core_optimizer.py
+# 오버로드 옵션 최적화: 4부위 x 3줄 조합 중 전투력/종결도가 가장 높은 상위 k개 구성을 분기 한정법으로 탐색
+import heapq
+from itertools import count, product
+from core_build import OPTION_IDS, NO_OPTION, N_LINES, LINES_PER_PART, CP_MULTIPLIERS, MAX_VALUES, option_value
+from core_utils import calculate_power_build
+
+OBJECTIVES = ("cp", "score")
+MAX_STAGE = 15
+# 탐색 점수는 정수(1e-9 단위)로 합산 (부동소수 합산 순서 차이로 동점 구성의 순위/가지치기가 흔들리지 않도록)
+_KEY_SCALE = 10 ** 9
+
+def valid_option_ids(nikke_data):
+    valid_ops = nikke_data.get('overload', {}).get('valid_ops', []) if nikke_data else []
+    return {OPTION_IDS[o] for o in valid_ops if o in OPTION_IDS}
+
+def candidate_types(nikke_data):
+    """재설정 후보 옵션 ID: 추천 옵션 -> 유효 옵션 순 (둘 다 없으면 전체 옵션)"""
+    ol_data = nikke_data.get('overload', {}) if nikke_data else {}
+    names = dict.fromkeys(ol_data.get('recommended_ops', []) + ol_data.get('valid_ops', []))
+    ids = [OPTION_IDS[n] for n in names if OPTION_IDS.get(n, NO_OPTION) != NO_OPTION]
+    return ids or [i for i in OPTION_IDS.values() if i != NO_OPTION]
+
+def line_gain(opt_id, stage, valid_ids):
+    """줄 하나의 기여 (CP 계수, 종결도 점수) - calculate_power_detailed와 같은 식 (종결도는 유효 옵션만)"""
+    if opt_id == NO_OPTION: return 0.0, 0.0
+    cp = stage * CP_MULTIPLIERS[opt_id]
+    max_val = MAX_VALUES[opt_id]
+    pct = (option_value(opt_id, stage) / max_val * 100) if max_val > 0 else 0
+    weight = 1.0 if opt_id in valid_ids else 0.0
+    return cp, (pct / 100) * weight * 100
+
+def _add(a, b):
+    return a[0] + b[0], a[1] + b[1]
+
+def _part_configs(choices, unique_per_part, top_k):
+    """
+    부위 하나(3줄)의 가능한 구성 -> 재설정 줄 수별 상위 top_k개만 남긴 목록 [(key, 재설정 수, ((ID, 단계) x 3))]
+    부위 안의 줄 순서만 다른 구성은 같은 결과이므로 (ID, 단계) 정렬 튜플 기준으로 재설정이 가장 적은 하나만 남깁니다.
+    같은 재설정 수에서 k개보다 뒤지는 구성은 전체 상위 k개에 들 수 없으므로 미리 버립니다.
+    """
+    unique = {}
+    for combo in product(*(enumerate(opts) for opts in choices)):
+        rerolls = sum(1 for i, _ in combo if i > 0)
+        if unique_per_part and rerolls:
+            types = [c[1] for _, c in combo]
+            if any(i > 0 and c[1] != NO_OPTION and types.count(c[1]) > 1 for i, c in combo): continue
+        lines = tuple((c[1], c[2]) for _, c in combo)
+        canon = tuple(sorted(lines))
+        if canon in unique and unique[canon][1] <= rerolls: continue
+        key = (0, 0)
+        for _, c in combo: key = _add(key, c[0])
+        unique[canon] = (key, rerolls, lines)
+    by_rerolls = {}
+    for config in unique.values():
+        by_rerolls.setdefault(config[1], []).append(config)
+    configs = []
+    for group in by_rerolls.values():
+        configs.extend(heapq.nlargest(top_k, group, key=lambda c: c[0]))
+    configs.sort(key=lambda c: c[0], reverse=True)
+    return configs
+
+def optimize_overload(build, nikke_data, objective="cp", max_rerolls=None, locked=(), types=None,
+                      target_stage=MAX_STAGE, top_k=5, unique_per_part=True):
+    """
+    현재 빌드에서 일부 줄을 재설정해 목표(objective: "cp" 전투력 / "score" 종결도)가 가장 높은 구성 상위 top_k개.
+    - 재설정한 줄은 types(기본: 추천/유효 옵션) 중 하나가 target_stage 단계로 붙는다고 가정합니다.
+    - locked: 유지할 줄 번호(0~11), max_rerolls: 재설정 줄 수 상한 (None = 제한 없음)
+    - unique_per_part: 재설정한 줄은 같은 부위의 다른 줄과 옵션 종류가 겹치지 않음
+    줄별 기여가 합산식이므로 부위별 구성(최대 10^3개)을 먼저 만들고, 남은 부위가 남은 재설정 횟수로 낼 수 있는
+    최대 점수(OVERLOAD_DATA 최대치 기준 DP)를 상한으로 삼아 k번째 결과를 넘을 수 없는 가지는 잘라냅니다.
+    (목표 지표가 같으면 다른 지표로 순위 결정)
+    반환: [{"build", "power", "score", "rerolls", "changes": [(줄, (이전 ID, 단계), (새 ID, 단계))]}] (좋은 순)
+    """
+    if objective not in OBJECTIVES: raise ValueError(f"알 수 없는 목표: {objective}")
+    if top_k <= 0: return []
+    valid_ids = valid_option_ids(nikke_data)
+    cands = list(types) if types is not None else candidate_types(nikke_data)
+    budget = N_LINES if max_rerolls is None else max(0, min(int(max_rerolls), N_LINES))
+    locked = set(locked)
+    order = (0, 1) if objective == "cp" else (1, 0)
+
+    def key_of(opt_id, stage):
+        gain = line_gain(opt_id, stage, valid_ids)
+        return round(gain[order[0]] * _KEY_SCALE), round(gain[order[1]] * _KEY_SCALE)
+
+    # 줄별 선택지: 첫 항목 = 유지, 이후 재설정 후보
+    choices = []
+    for line in range(N_LINES):
+        cur = (build.types[line], build.stages[line])
+        rerolls = []
+        if line not in locked:
+            rerolls = [(key_of(t, target_stage), t, target_stage) for t in cands if (t, target_stage) != cur]
+        choices.append([(key_of(*cur), cur[0], cur[1])] + rerolls)
+
+    parts = [_part_configs(choices[p:p + LINES_PER_PART], unique_per_part, top_k) for p in range(0, N_LINES, LINES_PER_PART)]
+
+    # 상한 표: best[d][r] = d번째 이후 부위에서 재설정 r줄 이하로 얻을 수 있는 최대 점수 (부위 단위 배낭 DP, 정확한 최댓값)
+    best = [[(0, 0)] * (budget + 1) for _ in range(len(parts) + 1)]
+    for d in range(len(parts) - 1, -1, -1):
+        for left in range(budget + 1):
+            best[d][left] = max(_add(key, best[d + 1][left - r]) for key, r, _ in parts[d] if r <= left)
+
+    heap = []  # (key, 순번, 줄별 선택) 최소 힙 = 현재 상위 k개
+    tie = count()
+
+    def search(d, left, acc, picked):
+        if d == len(parts):
+            entry = (acc, next(tie), picked)
+            if len(heap) < top_k: heapq.heappush(heap, entry)
+            else: heapq.heapreplace(heap, entry)
+            return
+        for key, r, lines in parts[d]:
+            if r > left: continue
+            total = _add(acc, key)
+            if len(heap) == top_k and _add(total, best[d + 1][left - r]) <= heap[0][0]: continue
+            search(d + 1, left - r, total, picked + lines)
+
+    search(0, budget, (0, 0), ())
+
+    results = []
+    for _, _, config in sorted(heap, key=lambda e: e[0], reverse=True):
+        new_build = build.replace(types=[t for t, _ in config], stages=[s for _, s in config])
+        res = calculate_power_build(new_build, nikke_data)
+        changes = [(line, (build.types[line], build.stages[line]), config[line])
+                   for line in range(N_LINES) if config[line] != (build.types[line], build.stages[line])]
+        results.append({"build": new_build, "power": res["power"], "score": res["score"],
+                        "rerolls": len(changes), "changes": changes})
+    return results
@@ -0,0 +1,302 @@
+# core_query.py
+import re
+from core_indexer import TEXT_SKILL_KEYS, SCOPED_FIELDS, popcount
+
+# 검색 쿼리 필드 -> facet 필드 (버스트는 부분 일치: burst:II)
+QUERY_FACETS = {"company": "company", "weapon": "weapon", "burst": "burst_type", "role": "role", "code": "code"}
+# 인덱스 조회만으로 끝나는 필드 (비트마스크 조회, 비용 거의 없음)
+CHEAP_FIELDS = {"tag", "skill", "effect", "same"} | set(QUERY_FACETS)
+# 후보를 하나씩 검증해야 하는 필드 (앞선 조건으로 좁혀진 후보 안에서만 실행)
+# normal:장탄 / skill2:도발 / weapon_info:울프스 / build:베어 → 해당 필드의 전문 색인만 검색
+SCAN_FIELDS = {"name", "text", "near"} | (set(SCOPED_FIELDS) - set(QUERY_FACETS))
+QUERY_FIELDS = CHEAP_FIELDS | SCAN_FIELDS
+
+KEYWORDS = ("AND", "OR", "NOT")
+EXPLAIN_PREFIX = "EXPLAIN"
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(\w+):"([^"]*)"|"([^"]*)"|([^\s()"]+))')
+_FIELD_RE = re.compile(r'^(\w+):(.*)$')
+_QUERY_HINT_RE = re.compile(r'(?:^|[\s(])(?:%s):|(?:^|\s)(?:AND|OR|NOT)(?:\s|$)|^%s\s' % ("|".join(sorted(QUERY_FIELDS)), EXPLAIN_PREFIX))
+
+class QuerySyntaxError(ValueError):
+    pass
+
+def looks_like_query(text):
+    """사이드바 입력이 일반 이름 검색이 아니라 쿼리 문법인지 판별 (field: 또는 AND/OR/NOT 사용)"""
+    return bool(_QUERY_HINT_RE.search(text or ""))
+
+# ----------------------------------------------------------------------
+# 토큰화 / 파싱
+# AST: ("or", [..]) / ("and", [..]) / ("not", node) / ("term", field, value)
+# ----------------------------------------------------------------------
+def tokenize(text):
+    """
+    (, ), AND/OR/NOT, field:value 토큰 목록.
+    field 없이 이어지는 단어는 직전 값에 붙습니다. (tag:크리티컬 대미지▲ → 한 값)
+    """
+    tokens = []
+    pos = 0
+    open_term = False
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos: raise QuerySyntaxError(f"해석할 수 없는 위치: {text[pos:]}")
+        pos = m.end()
+        lp, rp, q_field, q_value, quoted, word = m.groups()
+        if lp or rp:
+            tokens.append(("LP",) if lp else ("RP",))
+            open_term = False
+        elif q_field is not None:
+            tokens.append(("TERM", q_field.lower(), q_value))
+            open_term = False
+        elif quoted is not None:
+            tokens.append(("TERM", "name", quoted))
+            open_term = False
+        elif word in KEYWORDS:
+            tokens.append((word,))
+            open_term = False
+        else:
+            fm = _FIELD_RE.match(word)
+            if fm and fm.group(1).lower() in QUERY_FIELDS:
+                tokens.append(("TERM", fm.group(1).lower(), fm.group(2)))
+                open_term = True
+            elif open_term:
+                # 공백이 포함된 값 이어붙이기
+                _, field, value = tokens[-1]
+                tokens[-1] = ("TERM", field, f"{value} {word}" if value else word)
+            elif fm:
+                raise QuerySyntaxError(f"알 수 없는 필드: {fm.group(1)}")
+            else:
+                # 필드 없는 단어는 이름 검색
+                tokens.append(("TERM", "name", word))
+                open_term = True
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        if not self.tokens: raise QuerySyntaxError("빈 쿼리")
+        node = self.parse_or()
+        if self.pos != len(self.tokens): raise QuerySyntaxError("괄호 또는 연산자 위치가 올바르지 않습니다")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.parse_and())
+        return _flatten("or", children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() in ("AND", "NOT", "LP", "TERM"):
+            # 연산자 없이 이어진 조건은 AND
+            if self.peek() == "AND": self.take()
+            children.append(self.parse_not())
+        return _flatten("and", children)
+
+    def parse_not(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind = self.peek()
+        if kind == "LP":
+            self.take()
+            node = self.parse_or()
+            if self.peek() != "RP": raise QuerySyntaxError("닫는 괄호가 없습니다")
+            self.take()
+            return node
+        if kind == "TERM":
+            _, field, value = self.take()
+            value = value.strip()
+            if not value: raise QuerySyntaxError(f"{field}: 값이 비어 있습니다")
+            return ("term", field, value)
+        raise QuerySyntaxError("조건이 필요한 위치입니다" if kind else "쿼리가 끝나지 않았습니다")
+
+def _flatten(op, children):
+    if len(children) == 1: return children[0]
+    flat = []
+    for c in children:
+        if c[0] == op: flat.extend(c[1])
+        else: flat.append(c)
+    return (op, flat)
+
+def parse_query(text):
+    """쿼리 문자열 -> (AST, explain 여부)"""
+    text = (text or "").strip()
+    explain = text.upper().startswith(EXPLAIN_PREFIX + " ")
+    if explain: text = text[len(EXPLAIN_PREFIX):]
+    return _Parser(tokenize(text)).parse(), explain
+
+def canonical(node):
+    """결과 캐시 키용: 교환 가능한 AND/OR 자식 순서를 정렬한 AST"""
+    if node[0] in ("and", "or"):
+        return (node[0], tuple(sorted((canonical(c) for c in node[1]), key=repr)))
+    if node[0] == "not":
+        return ("not", canonical(node[1]))
+    return node
+
+def format_node(node):
+    if node[0] == "term": return f"{node[1]}:{node[2]}"
+    if node[0] == "not": return f"NOT {format_node(node[1])}"
+    return "(" + f" {node[0].upper()} ".join(format_node(c) for c in node[1]) + ")"
+
+# ----------------------------------------------------------------------
+# 실행 (TagIndexer 비트마스크)
+# ----------------------------------------------------------------------
+class QueryEngine:
+    """
+    AST를 TagIndexer의 태그/facet/이름/전문 색인으로 실행합니다.
+    AND는 조회 비용이 없는 조건을 결과 수가 적은 순서로 먼저 교집합하고,
+    검증이 필요한 조건(name/text)은 좁혀진 후보 안에서만 실행하며, 비면 즉시 중단합니다.
+    skill:<스킬> 조건은 같은 AND 안의 tag/text 조건 범위를 해당 스킬로 제한합니다.
+    """
+    def __init__(self, indexer):
+        self.indexer = indexer
+        self.plan = None
+
+    def execute(self, node, explain=False, within=None):
+        """within: 이미 좁혀진 후보 (예: 태그 칩 선택 결과). 없으면 전체"""
+        self.plan = [] if explain else None
+        if within is None: within = self.indexer.all_mask
+        return self._eval(node, None, within, 0)
+
+    # 실행 계획: 부모 단계를 먼저 자리 잡고, 자식 실행 후 결과 수를 채움 (위→아래 = 바깥→안쪽)
+    def _open(self, depth, label):
+        if self.plan is None: return None
+        self.plan.append([depth, label, 0])
+        return self.plan[-1]
+
+    def _close(self, step, mask):
+        if step is not None: step[2] = popcount(mask)
+        return mask
+
+    def _note(self, depth, label, count):
+        if self.plan is not None: self.plan.append([depth, label, count])
+
+    @staticmethod
+    def _label(node, scope):
+        label = format_node(node)
+        if scope and node[1] in ("tag", "text", "effect", "same", "near"): label += f" [{'/'.join(scope)}]"
+        return label
+
+    def _leaf(self, field, value, scope, within):
+        ix = self.indexer
+        if field == "tag":
+            if not scope: return ix.tag_bits.get(value, 0) & within
+            mask = 0
+            for sk_key in scope: mask |= ix.skill_tag_bits[sk_key].get(value, 0) if sk_key in ix.skill_tag_bits else 0
+            return mask & within
+        if field == "burst" and not ix.has_facet_value("burst_type", value):
+            # burst:II 는 버스트 단계, 버스트 단계 값이 아니면 버스트 스킬 필드 검색 (burst:도발)
+            return ix.search_field("burst", value, within)
+        if field in QUERY_FACETS:
+            return ix.facet_mask(QUERY_FACETS[field], value, substring=(field == "burst")) & within
+        if field in SCOPED_FIELDS:
+            return ix.search_field(field, value, within)
+        if field == "skill":
+            if value not in TEXT_SKILL_KEYS: raise QuerySyntaxError(f"알 수 없는 스킬: {value} ({', '.join(TEXT_SKILL_KEYS)})")
+            return ix.skill_mask(value) & within
+        if field == "effect":
+            # effect:공격력▲>=50%,지속>=10초,대상=아군 전체
+            try: return ix.search_effect(value, scope, within)
+            except ValueError as e: raise QuerySyntaxError(str(e))
+        if field == "same":
+            # same:공격력▲,아군 전체 → 같은 효과 블록(줄/문장) 안에 모두 등장
+            tags = [t.strip() for t in value.split(",") if t.strip()]
+            return ix.search_block(tags, within, scope)
+        if field == "near":
+            # near:공격력▲,아군 전체,5 → 같은 스킬 안에서 5토큰 이내
+            parts = [t.strip() for t in value.split(",")]
+            if len(parts) != 3 or not parts[2].isdigit():
+                raise QuerySyntaxError("near:태그1,태그2,거리 형식이어야 합니다")
+            return ix.search_near(parts[0], parts[1], int(parts[2]), within, scope)
+        if field == "name":
+            return ix.search_name(value, within)
+        if field == "text":
+            return ix.search_text(value, scope, within)
+        raise QuerySyntaxError(f"알 수 없는 필드: {field}")
+
+    def _eval(self, node, scope, within, depth):
+        kind = node[0]
+        if kind == "term":
+            step = self._open(depth, self._label(node, scope))
+            return self._close(step, self._leaf(node[1], node[2], scope, within))
+        if kind == "not":
+            step = self._open(depth, "NOT")
+            return self._close(step, within & ~self._eval(node[1], scope, within, depth + 1))
+        if kind == "or":
+            return self._eval_or(node[1], scope, within, depth)
+        return self._eval_and(node[1], scope, within, depth)
+
+    def _eval_or(self, children, scope, within, depth):
+        step = self._open(depth, "OR")
+        mask = 0
+        for i, child in enumerate(children):
+            mask |= self._eval(child, scope, within, depth + 1)
+            if mask == within and i + 1 < len(children):
+                # 이미 후보 전체 → 나머지 OR 조건 생략
+                self._note(depth + 1, f"(생략 {len(children) - i - 1}개: 후보 전체 일치)", popcount(mask))
+                break
+        return self._close(step, mask)
+
+    def _eval_and(self, children, scope, within, depth):
+        step = self._open(depth, "AND")
+        # skill: 조건은 같은 AND 안의 tag/text 조건 범위로 전달 (filter push-down)
+        skills = tuple(c[2] for c in children if c[0] == "term" and c[1] == "skill")
+        if skills: scope = skills
+
+        cheap, rest = [], []
+        for c in children:
+            if c[0] == "term" and c[1] in CHEAP_FIELDS: cheap.append(c)
+            else: rest.append(c)
+        # 하위 식 → 검증이 필요한 조건(name/text) → NOT 순서
+        rest.sort(key=lambda c: 2 if c[0] == "not" else (1 if c[0] == "term" else 0))
+
+        # 1) 조회 비용이 없는 조건: 결과 수가 적은(선택도 높은) 순서로 교집합
+        leaves = sorted(((self._leaf(c[1], c[2], scope, within), c) for c in cheap), key=lambda x: popcount(x[0]))
+        ordered = leaves + [(None, c) for c in rest]
+
+        mask = within
+        for i, (leaf_mask, c) in enumerate(ordered):
+            if leaf_mask is not None:
+                mask &= leaf_mask
+                self._note(depth + 1, self._label(c, scope), popcount(mask))
+            else:
+                # 2) 좁혀진 후보(mask) 안에서만 실행
+                mask = self._eval(c, scope, mask, depth + 1)
+            if not mask and i + 1 < len(ordered):
+                self._note(depth + 1, f"(생략 {len(ordered) - i - 1}개: 결과 없음)", 0)
+                break
+        return self._close(step, mask)
+
+def format_plan(plan):
+    """explain 결과를 들여쓰기 텍스트로"""
+    return "\n".join(f"{'  ' * depth}{label} → {count}" for depth, label, count in plan)
+
+def format_field_memory(report):
+    """필드별 색인 메모리 보고 (TagIndexer.field_memory) 를 텍스트로"""
+    lines = []
+    for field, info in report.items():
+        total = info["text"] + info["tags"]
+        lines.append(f"{field}: {total / 1024:.1f}KB (전문 {info['text'] / 1024:.1f}KB, 태그 {info['tags'] / 1024:.1f}KB, {info['docs']}명)")
+    return "\n".join(lines)
+
+def format_cache_stats(stats):
+    """검색 결과 캐시 통계 (QueryCache.stats) 를 텍스트로"""
+    return (f"{stats['size']}/{stats['capacity']}개 · 적중 {stats['hits']} / 미스 {stats['misses']}"
+            f" (적중률 {stats['hit_rate'] * 100:.1f}%)")
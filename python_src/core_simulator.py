@@ -0,0 +1,201 @@
+# core_simulator.py
+# 오버로드 재설정 몬테카를로 시뮬레이션: 현재 빌드에서 목표 종결도까지 필요한 재설정 횟수/자원 분포 추정 (NumPy 벡터화)
+import numpy as np
+from core_constants import OVERLOAD_OPT_TYPES
+from core_build import OPTION_IDS, NO_OPTION, N_LINES, LINES_PER_PART
+from core_batch import VALUE_TABLE, MAX_TABLE, N_OPTIONS, valid_ops_mask, encode_builds, calculate_power_batch
+
+# 재설정 확률 기본값 (실측 확률로 조정 가능)
+LINE_APPEAR_PROBS = (1.0, 0.5, 0.3)               # 부위의 1~3번째 줄 등장 확률
+TYPE_WEIGHTS = {name: 1.0 for name in OVERLOAD_OPT_TYPES}  # 옵션 종류 가중치 (한 부위 안에서는 중복 없이 추출)
+STAGE_WEIGHTS = (12,) * 5 + (7,) * 5 + (1,) * 5   # 1~15단계 가중치
+# 재설정 1회 비용 (커스텀 모듈): 기본 + 잠긴 줄당 추가
+REROLL_COST = 1
+LOCK_COST = 2
+PERCENTILES = (50, 75, 90, 99)
+
+# 옵션 ID x 단계 -> 최대(15단계) 대비 % (calculate_power_detailed의 줄별 pct)
+PCT_TABLE = np.divide(VALUE_TABLE * 100, MAX_TABLE[:, None], out=np.zeros_like(VALUE_TABLE), where=MAX_TABLE[:, None] > 0)
+N_STAGES = VALUE_TABLE.shape[1]
+# OVERLOAD_OPT_TYPES 순서 <-> 옵션 ID
+TYPE_IDS = np.array([OPTION_IDS[name] for name in OVERLOAD_OPT_TYPES])
+TYPE_INDEX = np.full(N_OPTIONS, -1)
+TYPE_INDEX[TYPE_IDS] = np.arange(len(TYPE_IDS))
+
+def _alias_table(weights):
+    """Walker alias 표: 가중치 비례 추출을 균등 정수 + 균등 실수 한 쌍으로 (prob, alias)"""
+    n = len(weights)
+    prob = np.asarray(weights, dtype=float) * n / np.sum(weights)
+    alias = np.arange(n)
+    small = [i for i in range(n) if prob[i] < 1.0]
+    large = [i for i in range(n) if prob[i] >= 1.0]
+    while small and large:
+        sm, lg = small.pop(), large.pop()
+        alias[sm] = lg
+        prob[lg] -= 1.0 - prob[sm]
+        (small if prob[lg] < 1.0 else large).append(lg)
+    prob[small + large] = 1.0
+    return prob, alias
+
+def _duplicated(pt, plk, need, new_t):
+    """새로 뽑은 줄 중 같은 부위의 잠긴 줄 / 앞선 새 줄과 종류가 겹치는 줄 (시행, 줄) bool"""
+    bad = np.zeros(need.shape, dtype=bool)
+    for j in range(LINES_PER_PART):
+        cand = new_t[:, j]
+        hit = np.zeros(len(cand), dtype=bool)
+        for q in range(LINES_PER_PART):
+            if q == j: continue
+            hit |= plk[:, q] & (pt[:, q] == cand)
+            if q < j: hit |= need[:, q] & (new_t[:, q] == cand)
+        bad[:, j] = need[:, j] & hit
+    return bad
+
+def _summary(values):
+    if values.size == 0: return None
+    result = {"mean": float(values.mean()), "std": float(values.std()),
+              "se": float(values.std() / np.sqrt(values.size))}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        result[f"p{p}"] = float(v)
+    return result
+
+def _final_power(build, codes, valid):
+    """줄 코드 (N, 부위, 줄)로 바꾼 build N개의 전투력 (calculate_power_batch 일괄 계산)"""
+    n = len(codes)
+    hp, atk, def_, s1, s2, burst, _, _, cube, col_grade, col1, col2 = (
+        np.repeat(np.asarray(x), n, axis=0) for x in encode_builds([build]))
+    codes = codes.astype(np.int64)
+    return calculate_power_batch(hp, atk, def_, s1, s2, burst, codes // N_STAGES, codes % N_STAGES,
+                                 cube, col_grade, col1, col2, valid)["power"]
+
+def simulate_rerolls(build, nikke_data, target_pct, trials=200_000, max_rerolls=3000, lock_pct=None,
+                     line_probs=LINE_APPEAR_PROBS, type_weights=None, stage_weights=STAGE_WEIGHTS,
+                     reroll_cost=REROLL_COST, lock_cost=LOCK_COST, checkpoints=10, tol=0.01, seed=None):
+    """
+    현재 빌드(Build)에서 오버로드 종결도가 target_pct(%) 이상이 될 때까지 재설정을 반복하는 시행을 trials번 모의실험합니다.
+    재설정 모델:
+    - 매 회 잠기지 않은 줄이 있는 부위 중 종결도 점수가 가장 낮은 부위 하나를 재설정합니다.
+    - 잠기지 않은 줄은 line_probs 확률로 등장하고, 종류는 type_weights 비례 (부위 내 중복 없음), 단계는 stage_weights 비례로 다시 뽑습니다.
+      (stage_weights 는 1단계부터의 가중치)
+    - 유효 옵션(valid_ops)이면서 최대치 대비 lock_pct% 이상인 줄은 잠가서 유지합니다.
+      (기본값 = 목표 종결도, 유효 종류가 3개 미만이면 채울 수 있는 줄 수에 맞춰 높임)
+    - 비용 = 재설정마다 reroll_cost + 잠긴 줄 수 x lock_cost
+    종결도는 계산기와 같이 유효 옵션 줄의 최대치 대비 % 합 / 1200 으로 채점합니다.
+    목표가 확률 설정상 도달 불가능하면(유효 종류/등장 줄 부족) 시뮬레이션 없이 reachable=False 를 반환합니다.
+    반환: 도달률, 도달한 시행의 재설정 횟수/비용/최종 전투력 통계(평균, 표준편차, 표준오차, 백분위), 시행 수별 평균 수렴 추이
+    """
+    rng = np.random.default_rng(seed)
+    valid = valid_ops_mask(nikke_data)
+    score_of = (PCT_TABLE * valid[:, None]).ravel() # 줄 코드 (옵션 ID x N_STAGES + 단계) -> 줄 점수
+    # 새 줄 (종류, 단계) 결합 분포 -> alias 표 (균등 정수 + 균등 실수 한 쌍으로 추출)
+    type_w = np.array([(type_weights or TYPE_WEIGHTS).get(name, 0.0) for name in OVERLOAD_OPT_TYPES], dtype=float)
+    stage_w = np.asarray(stage_weights, dtype=float)
+    joint_code = (TYPE_IDS[:, None] * N_STAGES + np.arange(1, len(stage_w) + 1)).ravel()
+    alias_prob, alias_idx = _alias_table(np.outer(type_w, stage_w).ravel())
+    appear_p = np.asarray(line_probs, dtype=float)
+
+    def draw_lines(size):
+        k = rng.integers(0, alias_prob.size, size)
+        return joint_code[np.where(rng.random(size) < alias_prob[k], k, alias_idx[k])]
+
+    # 시행별 상태: 줄 코드 (시행, 부위, 줄), 부위 점수 합 / 미완료 부위, 누적 재설정/비용
+    # 끝난 시행은 alive=False 로 두고 일정 비율이 쌓이면 배열을 압축
+    parts = len(build.types) // LINES_PER_PART
+    code0 = (np.asarray(build.types) * N_STAGES + np.clip(build.stages, 0, N_STAGES - 1)).reshape(parts, LINES_PER_PART)
+    start_score = float(score_of[code0].sum() / 1200 * 100)
+
+    # 도달 가능 상한: 부위마다 (등장 가능한 줄 수, 유효 종류 수) 중 작은 만큼의 줄이 최고 점수일 때
+    drawable = np.outer(type_w, stage_w).ravel() > 0
+    valid_kinds = int((valid[TYPE_IDS] & (type_w > 0)).sum())
+    lines_max = min(int((appear_p > 0).sum()), valid_kinds, LINES_PER_PART)
+    best_line = max(score_of[joint_code[drawable]].max(initial=0.0), score_of[code0].max())
+    reachable = start_score >= target_pct or parts * max(lines_max, 1) * best_line / 1200 * 100 >= target_pct
+    # 잠금 기준 기본값: 채울 수 있는 줄만으로 목표에 닿는 줄당 % (유효 종류가 3개 미만이면 그만큼 높게)
+    if lock_pct is None:
+        lock_pct = min(100.0, target_pct * N_LINES / (parts * max(lines_max, 1)))
+    lock_of = (valid[:, None] & (PCT_TABLE >= lock_pct)).ravel()
+
+    rerolls = np.zeros(trials, dtype=np.int64)
+    cost = np.zeros(trials)
+    final_code = np.tile(code0.astype(np.int16), (trials, 1, 1))  # 시행별 마지막 줄 구성 (전투력 일괄 계산용)
+    reached = np.full(trials, start_score >= target_pct)
+    ids = np.flatnonzero(~reached) if reachable else np.zeros(0, dtype=np.int64)
+    n = ids.size
+    code = np.tile(code0.astype(np.int16), (n, 1, 1))
+    part_sum = np.tile(score_of[code0].sum(axis=1), (n, 1))
+    part_open = np.tile(~lock_of[code0].all(axis=1), (n, 1))
+    n_rer, n_cost = np.zeros(n, dtype=np.int64), np.zeros(n)
+    alive = np.ones(n, dtype=bool)
+    n_alive = n
+
+    for _ in range(max_rerolls):
+        if n_alive == 0: break
+        n = ids.size
+        rows = np.arange(n)
+
+        # 대상 부위: 잠기지 않은 줄이 남은 부위 중 점수가 가장 낮은 부위 (모두 잠겼는데 미달이면 더 진행 불가)
+        stuck = ~part_open.any(axis=1)
+        part = np.where(part_open, part_sum, np.inf).argmin(axis=1)
+        pc = code[rows, part]
+        plk = lock_of[pc]
+        pt = pc // N_STAGES
+
+        # 새 줄: 잠기지 않은 줄마다 등장 여부 -> (종류, 단계), 종류가 겹치면 그 줄만 다시 뽑기 (= 부위 내 비복원 추출)
+        need = ~plk & (rng.random((n, LINES_PER_PART)) < appear_p)
+        new_c = draw_lines((n, LINES_PER_PART))
+        bad = _duplicated(pt, plk, need, new_c // N_STAGES)
+        r = np.flatnonzero(bad.any(axis=1))
+        for _retry in range(100):
+            if r.size == 0: break
+            sub_c, sub_bad = new_c[r], bad[r]
+            sub_c[sub_bad] = draw_lines(int(sub_bad.sum()))
+            new_c[r] = sub_c
+            sub_bad = _duplicated(pt[r], plk[r], need[r], sub_c // N_STAGES)
+            bad[r] = sub_bad
+            r = r[sub_bad.any(axis=1)]
+        else:
+            need &= ~bad # 뽑을 수 있는 종류 부족 -> 빈 줄
+
+        n_cost += reroll_cost + lock_cost * plk.sum(axis=1)
+        n_rer += 1
+        pc = np.where(plk, pc, np.where(need, new_c, 0))
+        code[rows, part] = pc
+        part_sum[rows, part] = score_of[pc].sum(axis=1)
+        part_open[rows, part] = ~lock_of[pc].all(axis=1)
+
+        done = alive & ~stuck & (part_sum.sum(axis=1) / 1200 * 100 >= target_pct)
+        finished = done | (alive & stuck)
+        if finished.any():
+            f = np.flatnonzero(finished)
+            reached[ids[np.flatnonzero(done)]] = True
+            # 막힌 시행은 이번 회차를 세지 않음
+            rerolls[ids[f]] = n_rer[f] - stuck[f]
+            cost[ids[f]] = n_cost[f] - stuck[f] * (reroll_cost + lock_cost * LINES_PER_PART)
+            final_code[ids[f]] = code[f]
+            alive[f] = False
+            n_alive -= f.size
+            if n - n_alive > n // 4:
+                ids, code, part_sum, part_open, n_rer, n_cost = (
+                    x[alive] for x in (ids, code, part_sum, part_open, n_rer, n_cost))
+                alive = np.ones(ids.size, dtype=bool)
+    rerolls[ids[alive]], cost[ids[alive]] = n_rer[alive], n_cost[alive] # max_rerolls 까지 미도달
+    final_code[ids[alive]] = code[alive]
+    # 시작 빌드 + 도달한 시행의 최종 빌드 전투력 (첫 행 = 시작 빌드)
+    power = _final_power(build, np.concatenate([code0[None], final_code[reached]]), valid)
+
+    # 수렴 추이: 앞에서부터 n개 시행까지의 평균 재설정 횟수 (도달한 시행 기준)
+    convergence = []
+    for k in range(1, checkpoints + 1):
+        m = trials * k // checkpoints
+        sample = rerolls[:m][reached[:m]]
+        if sample.size:
+            convergence.append({"trials": m, "mean": float(sample.mean()),
+                                "se": float(sample.std() / np.sqrt(sample.size))})
+    stats = _summary(rerolls[reached])
+    return {
+        "trials": trials, "target": target_pct, "lock_pct": lock_pct, "start_score": start_score, "reachable": reachable,
+        "start_power": int(power[0]), "power": _summary(power[1:]),
+        "reached_rate": float(reached.mean()),
+        "rerolls": stats, "cost": _summary(cost[reached]),
+        "convergence": convergence,
+        "converged": bool(stats and stats["se"] <= tol * stats["mean"]),
+    }
@@ -1,6 +1,7 @@
 # core_state.py
 from collections import Counter
 import tkinter as tk
+from core_build import Build, OPTION_IDS, NO_OPTION, parse_stage
 
 class AppState:
     def __init__(self):
@@ -16,8 +17,22 @@ class AppState:
         
         # 개별 스킬 범위 검색 활성화 여부
         self.search_scope_single_skill = None
+        # 효과 블록(줄/문장) 범위 검색 활성화 여부 (개별 스킬보다 세밀)
+        self.search_scope_block = None
+        # k-of-n 검색: 선택한 AND 태그 중 search_min_match개 이상 일치 (활성화 여부 / k)
+        self.search_threshold = None
+        self.search_min_match = None
         
         self.tag_counts = Counter()
+        
+        # 증분 태깅용: 마지막으로 태깅한 스킬 텍스트 / 태그 목록
+        # char_name -> { 'skill1': text, 'skill2': text, 'burst': text }
+        self.tagged_texts = {}
+        self.tagged_tag_set = None
+        # 태그 키워드 Aho-Corasick 오토마톤 (all_tags 변경 시 재생성)
+        self.tag_matcher = None
+        # 태그 부여 결과 캐시 (tag_cache.json): skill_text_hash -> {tags_hash, tags}
+        self.tag_cache = None
         self.themes = {}
         self.current_theme_name = "Blue Pro (Default)"
         
@@ -39,4 +54,15 @@ class AppState:
         self.calc_opts = [[None]*3 for _ in range(4)]
         
         # ★ [추가] 검색 엔진 인덱서
-        self.indexer = None
\ No newline at end of file
+        self.indexer = None
+
+    def current_build(self):
+        """계산 탭 입력값 -> Build (입력값이 숫자가 아니면 ValueError)"""
+        v = self.calc_vars
+        types, stages = [], []
+        for part_opts in self.calc_opts:
+            for t_var, s_var, *_ in part_opts:
+                types.append(OPTION_IDS.get(t_var.get(), NO_OPTION))
+                stages.append(parse_stage(s_var.get()))
+        return Build(v["hp"].get(), v["atk"].get(), v["def"].get(), v["s1"].get(), v["s2"].get(), v["burst"].get(),
+                     v["cube_lvl"].get(), v["col_grade"].get(), v["col_skill1"].get(), v["col_skill2"].get(), types, stages)
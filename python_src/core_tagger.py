@@ -0,0 +1,171 @@
+# core_tagger.py
+import re
+from bisect import bisect_right
+from collections import deque, namedtuple
+
+# 괄호 효과: [공격력 95.04% ▲] / 「공격력 23.23% ▲」
+_BRACKET_RE = re.compile(r'\[([^\[\]\n]*)\]|「([^「」\n]*)」')
+# 괄호 없는 효과 줄의 대상 머리말: "아군 전체에게: 공격력 10% ▲"
+_TARGET_HEAD_RE = re.compile(r'에게\s*:')
+# 효과 블록(문장) 경계: 줄바꿈 / 마침표 뒤 공백
+_BLOCK_SPLIT_RE = re.compile(r'\n|(?<=\.)\s+')
+_TOKEN_RE = re.compile(r'\S+')
+
+def tag_keyword(tag):
+    """태그에서 ▲/▼ 방향 표시를 제거한 검색 키워드"""
+    return tag.replace("▲", "").replace("▼", "").strip()
+
+def tag_direction(tag):
+    """태그의 방향 표시 (▲ / ▼ / 없음)"""
+    if "▲" in tag: return "▲"
+    if "▼" in tag: return "▼"
+    return ""
+
+# 효과 구간 1개: 원문 [start, end) / 방향 / 괄호를 뺀 본문 [body_start, body_end)
+EffectSpan = namedtuple("EffectSpan", "start end direction body_start body_end")
+
+def _bare_span(text, start, end):
+    """괄호 밖 ▲/▼가 있는 줄 구간 -> 효과 구간 (대상 머리말과 앞뒤 공백 제외)"""
+    m = None
+    for m in _TARGET_HEAD_RE.finditer(text, start, end): pass
+    if m: start = m.end()
+    segment = text[start:end]
+    body_start = start + len(segment) - len(segment.lstrip())
+    body_end = start + len(segment.rstrip())
+    return EffectSpan(body_start, body_end, tag_direction(segment), body_start, body_end)
+
+def effect_spans(text):
+    """
+    효과 구간과 방향: [EffectSpan, ...] (start 순 정렬, 서로 겹치지 않음)
+    [ ] / 「 」 괄호 하나가 효과 1개이며, 괄호 밖에 ▲/▼가 있으면 그 줄에서 괄호 사이 구간을 효과 1개로 봅니다.
+    ("공격 속도 : 90% ▼" 처럼 괄호 없이 적힌 효과)
+    방향 태그(공격력▲ 등)는 같은 방향 표시가 있는 효과 구간 안에서 등장할 때만 일치로 봅니다.
+    """
+    spans = []
+    line_start = 0
+    for line in text.split("\n"):
+        line_end = line_start + len(line)
+        prev = line_start
+        for m in _BRACKET_RE.finditer(text, line_start, line_end):
+            if "▲" in text[prev:m.start()] or "▼" in text[prev:m.start()]:
+                spans.append(_bare_span(text, prev, m.start()))
+            body = 1 if m.group(1) is not None else 2
+            spans.append(EffectSpan(m.start(), m.end(), tag_direction(m.group(body)), m.start(body), m.end(body)))
+            prev = m.end()
+        if "▲" in text[prev:line_end] or "▼" in text[prev:line_end]:
+            spans.append(_bare_span(text, prev, line_end))
+        line_start = line_end + 1
+    return spans
+
+def _in_direction(eff_spans, starts, direction, start, end):
+    i = bisect_right(starts, start) - 1
+    if i < 0: return False
+    span = eff_spans[i]
+    return end <= span.end and span.direction == direction
+
+def _lower_aligned(text):
+    """오프셋이 원문과 1:1로 유지되도록 소문자화"""
+    low = text.lower()
+    if len(low) == len(text): return low
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+class TagMatcher:
+    """
+    Aho-Corasick 다중 패턴 태거.
+    모든 태그 키워드로 하나의 오토마톤을 만들고, 스킬 텍스트를 한 번만 훑어
+    등장하는 모든 태그와 위치(start, end)를 찾습니다.
+    방향 태그(▲/▼)는 텍스트의 효과 구간(effect_spans)을 한 번 추출해, 같은 방향의 효과 안에 있는 일치만 남깁니다.
+    (공격력▲ 와 공격력▼ 가 "공격력"이 있는 모든 텍스트에 함께 붙지 않도록)
+    """
+    def __init__(self, tags):
+        self.tag_set = frozenset(tags)
+        # 키워드가 비어있는 태그 (예: "▲")는 정규식 ""와 동일하게 항상 일치 (방향 태그면 해당 방향 괄호가 있을 때)
+        self.always_tags = []
+        self.directions = {t: tag_direction(t) for t in self.tag_set}
+
+        # node -> { char -> node }
+        self.goto = [{}]
+        self.fail = [0]
+        # node -> [(tag, keyword_len)]
+        self.out = [[]]
+
+        for tag in self.tag_set:
+            kw = tag_keyword(tag).lower()
+            if not kw:
+                self.always_tags.append(tag)
+                continue
+            node = 0
+            for ch in kw:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append((tag, len(kw)))
+
+        # 실패 링크 (BFS) 및 출력 병합
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                cand = self.goto[f].get(ch, 0)
+                self.fail[nxt] = cand if cand != nxt else 0
+                if self.out[self.fail[nxt]]:
+                    self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """(tag, start, end) 를 텍스트 등장 순서대로 반환"""
+        directions = self.directions
+        eff_spans = effect_spans(text) if any(directions.values()) else []
+        starts = [b.start for b in eff_spans]
+        for tag in self.always_tags:
+            d = directions[tag]
+            if not d or any(b.direction == d for b in eff_spans):
+                yield tag, 0, 0
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(_lower_aligned(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for tag, length in out[node]:
+                start = i + 1 - length
+                d = directions[tag]
+                if d and not _in_direction(eff_spans, starts, d, start, i + 1): continue
+                yield tag, start, i + 1
+
+    def find_spans(self, text):
+        """태그별 일치 위치 목록: { tag: [(start, end), ...] }"""
+        spans = {}
+        for tag, start, end in self.iter_matches(text):
+            spans.setdefault(tag, []).append((start, end))
+        return spans
+
+def skill_text(skill):
+    """태깅 대상 텍스트: 스킬 이름 + 설명"""
+    return f"{skill.get('name', '')} {skill.get('desc', '')}"
+
+class TextLayout:
+    """
+    스킬 텍스트의 효과 블록/토큰 경계.
+    블록 0은 스킬 이름(head_len 글자), 이후 설명의 줄/문장마다 블록 번호가 1씩 증가합니다.
+    """
+    def __init__(self, text, head_len=0):
+        self.block_starts = [0]
+        if head_len: self.block_starts.append(head_len)
+        for m in _BLOCK_SPLIT_RE.finditer(text, head_len):
+            if m.end() > self.block_starts[-1]: self.block_starts.append(m.end())
+        self.token_starts = [m.start() for m in _TOKEN_RE.finditer(text)]
+
+    def block_of(self, offset):
+        return bisect_right(self.block_starts, offset) - 1
+
+    def token_of(self, offset):
+        return max(bisect_right(self.token_starts, offset) - 1, 0)
@@ -0,0 +1,155 @@
+# core_upgrade.py
+# 육성 효율 순위: 현재 빌드에서 한 단계씩 올릴 수 있는 모든 항목의 전투력/종결도 증가량을 한 번에 계산
+from core_constants import OPTION_LIST, PARTS, PART_NAMES
+from core_build import NO_OPTION, N_LINES, LINES_PER_PART, STAGE_VALUES
+from core_optimizer import line_gain, valid_option_ids
+
+MAX_SKILL_LV = 10
+MAX_CUBE_LV = 15
+MAX_COL_SKILL_LV = 15
+# 소장품 등급 -> (기본 계수, 스킬2 반영 여부) (calculate_power_detailed와 동일)
+COL_GRADE_COEFF = {"R": (6.33, False), "SR": (10.66, True), "SSR": (15.00, True)}
+
+# 한 단계 올리는 데 드는 상대 자원 비용 (현재 레벨/단계 인덱스, 임의 단위 - 자원당 효율 정렬용 기본값)
+DEFAULT_STEP_COSTS = {
+    "ol": (1, 1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 5, 6, 8, 10),
+    "skill": (1, 1, 1, 2, 2, 3, 4, 5, 6, 8),
+    "cube": (1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 5, 5, 5),
+    "col": (1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 5, 5, 5),
+}
+SKILL_LABELS = {"s1": "스킬1", "s2": "스킬2", "burst": "버스트"}
+COL_SKILL_LABELS = {"col_skill1": "소장품 스킬1", "col_skill2": "소장품 스킬2"}
+
+def _col_coeff_val(grade, skill1, skill2):
+    if grade not in COL_GRADE_COEFF: return 0
+    base, uses_skill2 = COL_GRADE_COEFF[grade]
+    return skill1 + skill2 + base if uses_skill2 else skill1 + base
+
+def _fold(start, values):
+    total = start
+    for v in values: total += v
+    return total
+
+class UpgradeRanker:
+    """
+    한 단계 육성 후보(오버로드 줄 +1단계, 스킬 +1, 큐브 +1, 소장품 +1)의 전투력/종결도 증가량 계산기.
+    빌드의 부분합(기본 스탯 합, 스킬/큐브/소장품 계수, 줄별 CP 계수/종결도 점수와 그 누적합)을 캐시해 두고,
+    다음 빌드에서는 바뀐 입력에 해당하는 부분만 다시 계산합니다. (입력 하나가 바뀌면 즉시 재정렬)
+    합산 순서를 calculate_power_detailed와 같게 맞춰 결과 전투력/종결도가 정확히 일치합니다.
+    """
+    def __init__(self, costs=None):
+        self.costs = {**DEFAULT_STEP_COSTS, **(costs or {})}
+        self.build = None
+        self.valid_ids = None
+        self.line_cp = [0.0] * N_LINES
+        self.line_score = [0.0] * N_LINES
+        # cp_prefix[i] / score_prefix[i] = 0 ~ i-1번째 줄 합 (길이 N_LINES + 1)
+        self.cp_prefix = [0.0] * (N_LINES + 1)
+        self.score_prefix = [0.0] * (N_LINES + 1)
+        self.updated = ()  # 마지막 갱신에서 다시 계산한 부분합 이름
+
+    def refresh(self, build, nikke_data):
+        """캐시를 build 기준으로 갱신 (바뀐 입력의 부분합만 재계산)"""
+        valid_ids = frozenset(valid_option_ids(nikke_data))
+        old = self.build if valid_ids == self.valid_ids else None
+        updated = []
+        if old is None or (old.hp, old.atk, old.def_) != (build.hp, build.atk, build.def_):
+            self.base_sum = 0.7 * float(build.hp) + 19.35 * float(build.atk) + 70.0 * float(build.def_)
+            updated.append("base")
+        if old is None or (old.s1, old.s2, old.burst) != (build.s1, build.s2, build.burst):
+            self.skill_coeff = self._skill_coeff(build.s1, build.s2, build.burst)
+            updated.append("skill")
+        if old is None or old.cube_lvl != build.cube_lvl:
+            self.cube_coeff = 0.0092 * build.cube_lvl
+            updated.append("cube")
+        if old is None or (old.col_grade, old.col_skill1, old.col_skill2) != (build.col_grade, build.col_skill1, build.col_skill2):
+            self.col_coeff = 0.0069 * _col_coeff_val(build.col_grade, build.col_skill1, build.col_skill2)
+            updated.append("col")
+
+        changed = [i for i in range(N_LINES)
+                   if old is None or (old.types[i], old.stages[i]) != (build.types[i], build.stages[i])]
+        for i in changed:
+            self.line_cp[i], self.line_score[i] = line_gain(build.types[i], build.stages[i], valid_ids)
+        if changed:
+            for i in range(changed[0], N_LINES):
+                self.cp_prefix[i + 1] = self.cp_prefix[i] + self.line_cp[i]
+                self.score_prefix[i + 1] = self.score_prefix[i] + self.line_score[i]
+            updated.append(f"lines{changed}")
+
+        self.build, self.valid_ids, self.updated = build, valid_ids, tuple(updated)
+
+    @staticmethod
+    def _skill_coeff(s1, s2, burst):
+        return (0.01 * s1) + (0.01 * s2) + (0.02 * burst)
+
+    def _power(self, skill_coeff, ol_coeff, cube_coeff, col_coeff):
+        total_coeff = 1.3 + skill_coeff + ol_coeff + cube_coeff + col_coeff
+        return round((self.base_sum * total_coeff) / 100)
+
+    def _line_sums(self, line, cp, score):
+        """line번째 줄만 (cp, score)로 바꾼 오버로드 CP 계수 합 / 종결도 점수 합 (앞부분은 누적합 재사용)"""
+        rest = slice(line + 1, N_LINES)
+        return (_fold(self.cp_prefix[line] + cp, self.line_cp[rest]),
+                _fold(self.score_prefix[line] + score, self.line_score[rest]))
+
+    def candidates(self):
+        """현재 빌드의 한 단계 육성 후보: [(종류, 대상, 현재 레벨/단계, 표시 이름)]"""
+        b = self.build
+        result = []
+        for line in range(N_LINES):
+            t, s = b.types[line], b.stages[line]
+            if t == NO_OPTION or not 0 <= s < len(STAGE_VALUES[t]) - 1: continue
+            part = PARTS[line // LINES_PER_PART]
+            result.append(("ol", line, s, f"{PART_NAMES[part]} {line % LINES_PER_PART + 1}줄 {OPTION_LIST[t]} {s}→{s + 1}단계"))
+        for key, label in SKILL_LABELS.items():
+            lv = getattr(b, key)
+            if lv < MAX_SKILL_LV: result.append(("skill", key, lv, f"{label} Lv.{lv}→{lv + 1}"))
+        if b.cube_lvl < MAX_CUBE_LV:
+            result.append(("cube", "cube_lvl", b.cube_lvl, f"큐브 Lv.{b.cube_lvl}→{b.cube_lvl + 1}"))
+        if b.col_grade in COL_GRADE_COEFF:
+            keys = ("col_skill1", "col_skill2") if COL_GRADE_COEFF[b.col_grade][1] else ("col_skill1",)
+            for key in keys:
+                lv = getattr(b, key)
+                if lv < MAX_COL_SKILL_LV: result.append(("col", key, lv, f"{COL_SKILL_LABELS[key]} Lv.{lv}→{lv + 1}"))
+        return result
+
+    def step_cost(self, kind, level):
+        table = self.costs[kind]
+        return table[min(max(level, 0), len(table) - 1)]
+
+    def rank(self, build, nikke_data, metric="cp"):
+        """
+        모든 한 단계 육성 후보를 한 번에 평가해 자원당 증가량(metric: "cp" / "score") 순으로 반환.
+        반환: (현재 {"power", "score"}, [{"kind", "target", "label", "cp", "score", "cost", "cp_per_cost", "score_per_cost"}])
+        """
+        self.refresh(build, nikke_data)
+        b = self.build
+        ol_cp, ol_score = self.cp_prefix[N_LINES], self.score_prefix[N_LINES]
+        base_power = self._power(self.skill_coeff, ol_cp, self.cube_coeff, self.col_coeff)
+        base_score = (ol_score / 1200) * 100
+
+        rows = []
+        for kind, target, level, label in self.candidates():
+            skill, cube, col, line_cp, line_score = self.skill_coeff, self.cube_coeff, self.col_coeff, ol_cp, ol_score
+            if kind == "ol":
+                new_cp, new_score = line_gain(b.types[target], b.stages[target] + 1, self.valid_ids)
+                line_cp, line_score = self._line_sums(target, new_cp, new_score)
+            elif kind == "skill":
+                levels = {"s1": b.s1, "s2": b.s2, "burst": b.burst}
+                levels[target] += 1
+                skill = self._skill_coeff(levels["s1"], levels["s2"], levels["burst"])
+            elif kind == "cube":
+                cube = 0.0092 * (b.cube_lvl + 1)
+            else:
+                col_levels = {"col_skill1": b.col_skill1, "col_skill2": b.col_skill2}
+                col_levels[target] += 1
+                col = 0.0069 * _col_coeff_val(b.col_grade, col_levels["col_skill1"], col_levels["col_skill2"])
+            d_cp = self._power(skill, line_cp, cube, col) - base_power
+            d_score = (line_score / 1200) * 100 - base_score
+            cost = self.step_cost(kind, level)
+            rows.append({"kind": kind, "target": target, "label": label, "cp": d_cp, "score": d_score,
+                         "cost": cost, "cp_per_cost": d_cp / cost, "score_per_cost": d_score / cost})
+
+        primary, secondary = ("cp", "score") if metric == "cp" else ("score", "cp")
+        rows.sort(key=lambda r: (r[f"{primary}_per_cost"], r[primary], r[secondary]), reverse=True)
+        return {"power": base_power, "score": base_score}, rows
@@ -1,44 +1,57 @@
 # core_utils.py
-from collections import defaultdict
-from core_constants import OVERLOAD_DATA, OVERLOAD_OPT_TYPES, PARTS, WEAPON_OPTION_DEFAULTS
+from core_constants import OVERLOAD_DATA, OVERLOAD_OPT_TYPES, OPTION_LIST, PARTS, WEAPON_OPTION_DEFAULTS
+from core_build import OPTION_IDS, NO_OPTION, CP_MULTIPLIERS, MAX_VALUES, option_value, parse_stage
+
+CHOSUNG = ('ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+JUNGSUNG = ('ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 'ㅙ', 'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ')
+JONGSUNG = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+# 겹모음/겹받침은 입력 순서대로 분해 (고→과, 갑→값 입력 중에도 앞부분이 일치하도록)
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
 
 def get_chosung(text):
-    CHO = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
     result = []
     for char in text:
         if '가' <= char <= '힣':
             code = ord(char) - ord('가')
-            result.append(CHO[code // (21 * 28)])
+            result.append(CHOSUNG[code // (21 * 28)])
         else:
             result.append(char)
     return ''.join(result)
 
+def decompose_jamo(text):
+    """한글 음절을 자모 단위로 분해 ("레드" -> "ㄹㅔㄷㅡ"), 한글 외 문자는 그대로"""
+    result = []
+    for char in text:
+        if '가' <= char <= '힣':
+            code = ord(char) - ord('가')
+            result.append(CHOSUNG[code // (21 * 28)])
+            result.append(COMPOUND_JAMO.get(JUNGSUNG[(code // 28) % 21], JUNGSUNG[(code // 28) % 21]))
+            jong = JONGSUNG[code % 28]
+            if jong: result.append(COMPOUND_JAMO.get(jong, jong))
+        else:
+            result.append(COMPOUND_JAMO.get(char, char))
+    return ''.join(result)
+
+def normalize_search_key(text):
+    """검색 비교용 키: 소문자 + 공백 제거"""
+    return text.lower().replace(" ", "") if text else ""
+
+def has_chosung(text):
+    return any('ㄱ' <= c <= 'ㅎ' for c in text)
+
 def match_search(term, text):
     if not term or not text: return False
-    t = term.lower().replace(" ", "")
-    txt = text.lower().replace(" ", "")
+    t = normalize_search_key(term)
+    txt = normalize_search_key(text)
     if t in txt: return True
-    if any('ㄱ' <= c <= 'ㅎ' for c in t):
+    if has_chosung(t):
         if t in get_chosung(txt): return True
     return False
 
-def get_option_value_from_stage_str(option_type, stage_str):
-    if option_type == "옵션없음" or option_type not in OVERLOAD_DATA: return 0
-    try:
-        if "단계" in stage_str:
-            stage_num = int(stage_str.split("단계")[0].strip())
-            return OVERLOAD_DATA[option_type][stage_num] if 0 <= stage_num < len(OVERLOAD_DATA[option_type]) else 0
-        else:
-            stage_num = int(stage_str)
-            return OVERLOAD_DATA[option_type][stage_num] if 0 <= stage_num < len(OVERLOAD_DATA[option_type]) else 0
-    except: return 0
-
-def get_stage_number(stage_str):
-    try:
-        if "단계" in stage_str: return int(stage_str.split("단계")[0].strip())
-        return int(stage_str)
-    except: return 0
-
 def get_max_value_for_option(option_type):
     """해당 옵션의 15단계(최대) 수치를 반환"""
     if option_type in OVERLOAD_DATA:
@@ -64,6 +77,24 @@ def calculate_grade(is_valid, percentage):
     else: return "B (아쉬움)", "neutral"
 
 def calculate_power_detailed(hp, atk, def_, skill1, skill2, burst, part_options, cube_lvl, col_grade, col_skill1, col_skill2, weapon, nikke_data=None):
+    try:
+        types, stages = [], []
+        for p in PARTS:
+            for i in range(1, 4):
+                opt = part_options[p][f"option{i}"]
+                types.append(OPTION_IDS.get(opt['type'], NO_OPTION))
+                stages.append(parse_stage(opt['stage']))
+    except Exception as e:
+        print(f"Calc Error: {e}")
+        return {"power": 0, "score": 0, "details": {}}
+    return _calculate_power(hp, atk, def_, skill1, skill2, burst, types, stages, cube_lvl, col_grade, col_skill1, col_skill2, nikke_data)
+
+def calculate_power_build(build, nikke_data=None):
+    """Build 값으로 전투력 계산 (calculate_power_detailed와 같은 결과, 단계 문자열 해석 없음)"""
+    return _calculate_power(build.hp, build.atk, build.def_, build.s1, build.s2, build.burst, build.types, build.stages,
+                            build.cube_lvl, build.col_grade, build.col_skill1, build.col_skill2, nikke_data)
+
+def _calculate_power(hp, atk, def_, skill1, skill2, burst, types, stages, cube_lvl, col_grade, col_skill1, col_skill2, nikke_data=None):
     try:
         # 1. 기본 스탯 CP
         term1 = 0.7 * float(hp)
@@ -89,46 +120,42 @@ def calculate_power_detailed(hp, atk, def_, skill1, skill2, burst, part_options,
         
         col_coeff = 0.0069 * col_coeff_val
 
-        # 2. 오버로드 데이터 집계
+        # 2. 오버로드 데이터 집계 (옵션 ID / 정수 단계, 문자열 해석 없음)
         total_ol_cp_coeff = 0 
         total_ol_potential_score = 0 
-        valid_ops = nikke_data.get('overload', {}).get('valid_ops', []) if nikke_data else []
         
-        # 합계 계산을 위한 딕셔너리
-        # Key: 옵션명, Value: {현재값합계, 최대값합계(15단계기준), 줄수, CP계수합, 유효여부}
-        agg_stats = defaultdict(lambda: {"curr": 0.0, "max": 0.0, "count": 0, "cp": 0.0, "is_valid": False})
+        # 합계 계산을 위한 딕셔너리 (옵션 첫 등장 순서 유지)
+        # Key: 옵션 ID, Value: [현재값합계, 최대값합계(15단계기준), 줄수, CP계수합, 유효여부]
+        agg_stats = {}
+        valid_ops = nikke_data.get('overload', {}).get('valid_ops', []) if nikke_data else []
+        valid_ids = {OPTION_IDS[o] for o in valid_ops if o in OPTION_IDS}
 
-        for p in PARTS:
-            for i in range(1, 4):
-                opt = part_options[p][f"option{i}"]
-                o_type = opt['type']
-                stage_str = opt['stage']
-                
-                if o_type == "옵션없음": continue
-
-                # CP 계산
-                stage_num = get_stage_number(stage_str)
-                cp_multiplier = 0.00828 if o_type == "우월코드 대미지 증가" else 0.0069
-                cp_coeff = stage_num * cp_multiplier
-                total_ol_cp_coeff += cp_coeff
-                
-                # 수치 계산
-                current_val = get_option_value_from_stage_str(o_type, stage_str)
-                max_val_single = get_max_value_for_option(o_type)
-                
-                # 유효성 및 개별 점수 (종결도 계산용)
-                is_valid = o_type in valid_ops
-                pct_single = (current_val / max_val_single * 100) if max_val_single > 0 else 0
-                weight = 1.0 if is_valid else 0.0 
-                line_score = (pct_single / 100) * weight * 100 
-                total_ol_potential_score += line_score
-                
-                # 합산 데이터 누적
-                agg_stats[o_type]["curr"] += current_val
-                agg_stats[o_type]["max"] += max_val_single
-                agg_stats[o_type]["count"] += 1
-                agg_stats[o_type]["cp"] += (base_sum * cp_coeff) / 100
-                agg_stats[o_type]["is_valid"] = is_valid
+        for o_id, stage_num in zip(types, stages):
+            if o_id == NO_OPTION: continue
+
+            # CP 계산
+            cp_coeff = stage_num * CP_MULTIPLIERS[o_id]
+            total_ol_cp_coeff += cp_coeff
+            
+            # 수치 계산
+            current_val = option_value(o_id, stage_num)
+            max_val_single = MAX_VALUES[o_id]
+            
+            # 유효성 및 개별 점수 (종결도 계산용)
+            is_valid = o_id in valid_ids
+            pct_single = (current_val / max_val_single * 100) if max_val_single > 0 else 0
+            weight = 1.0 if is_valid else 0.0 
+            line_score = (pct_single / 100) * weight * 100 
+            total_ol_potential_score += line_score
+            
+            # 합산 데이터 누적
+            agg = agg_stats.get(o_id)
+            if agg is None: agg = agg_stats[o_id] = [0.0, 0.0, 0, 0.0, False]
+            agg[0] += current_val
+            agg[1] += max_val_single
+            agg[2] += 1
+            agg[3] += (base_sum * cp_coeff) / 100
+            agg[4] = is_valid
 
         total_coeff = base_coeff + skill_coeff + total_ol_cp_coeff + cube_coeff + col_coeff
         final_power = (base_sum * total_coeff) / 100
@@ -139,18 +166,18 @@ def calculate_power_detailed(hp, atk, def_, skill1, skill2, burst, part_options,
         
         # 합산 데이터를 리스트 형태로 변환 및 등급 산정
         final_aggregated_list = []
-        for o_type, data in agg_stats.items():
+        for o_id, (curr, max_sum, count, cp, is_valid) in agg_stats.items():
             # 해당 옵션의 종합 퍼센트 (현재합 / 최대합)
-            total_pct = (data["curr"] / data["max"] * 100) if data["max"] > 0 else 0
-            grade_str, grade_tag = calculate_grade(data["is_valid"], total_pct)
+            total_pct = (curr / max_sum * 100) if max_sum > 0 else 0
+            grade_str, grade_tag = calculate_grade(is_valid, total_pct)
             
             final_aggregated_list.append({
-                "type": o_type,
-                "lines": data["count"],
-                "val": data["curr"],
-                "max": data["max"],
+                "type": OPTION_LIST[o_id],
+                "lines": count,
+                "val": curr,
+                "max": max_sum,
                 "pct": total_pct,
-                "cp": data["cp"],
+                "cp": cp,
                 "grade": grade_str,
                 "tag": grade_tag
             })
@@ -1,11 +1,12 @@
 # io_files.py
 import os
 import json
-import re
 from collections import Counter
 from core_constants import *
 from core_state import AppState
-from core_indexer import TagIndexer # 인덱서 임포트
+from core_indexer import TagIndexer, SKILL_KEYS # 인덱서 임포트
+from core_tagger import TagMatcher, skill_text
+from core_effects import text_hash
 
 def load_themes(state: AppState):
     if os.path.exists(THEMES_FILE):
@@ -119,42 +120,212 @@ def inject_recommended_builds(state: AppState):
     if modified_count > 0:
         save_database_silent(state)
 
-def auto_generate_tags(state: AppState, silent=False):
+def _char_skill_texts(char):
+    skills = char.get("skills", {})
+    return {k: skill_text(skills[k]) for k in SKILL_KEYS if k in skills}
+
+def _tag_set_hash(tag_set):
+    return text_hash("\n".join(sorted(tag_set)))
+
+# 태깅 규칙이 바뀌면 올려서 이전 캐시를 버림
+# (2: 방향 태그는 같은 방향 괄호 안에서만 일치, 3: 「 」 괄호 / 괄호 없는 ▲▼ 줄도 효과 구간으로 인정,
+#  4: 태그 목록 대신 태그별 일치 위치 저장)
+TAG_CACHE_VERSION = 4
+
+def load_tag_cache(state: AppState):
+    state.tag_cache = {}
+    if os.path.exists(TAG_CACHE_FILE):
+        try:
+            with open(TAG_CACHE_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == TAG_CACHE_VERSION:
+                state.tag_cache = data.get("entries", {})
+        except: pass
+
+def save_tag_cache(state: AppState):
+    try:
+        with open(TAG_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"version": TAG_CACHE_VERSION, "entries": state.tag_cache}, f, ensure_ascii=False)
+    except: pass
+
+def _cached_skill_spans(state: AppState, full_text, tags_hash, source=None):
+    """
+    스킬 텍스트 해시로 캐시(source, 기본: state.tag_cache)를 조회하고, 태그 목록 해시까지 같으면 매칭을 생략합니다.
+    결과는 state.tag_cache에 기록되며, 캐시 엔트리는 스킬 단위로 무효화/갱신됩니다.
+    반환: 태깅 한 번으로 얻은 태그별 일치 위치 { tag: [(start, end), ...] } (키 = 부여된 태그)
+    """
+    entry = (state.tag_cache if source is None else source).get(text_hash(full_text))
+    if entry and entry.get("tags_hash") == tags_hash:
+        spans = entry["spans"]
+    else:
+        spans = get_tag_matcher(state).find_spans(full_text)
+    return _store_cached_skill_spans(state, full_text, tags_hash, spans)
+
+def _store_cached_skill_spans(state: AppState, full_text, tags_hash, spans):
+    # JSON으로 저장/비교하므로 위치는 [start, end] 리스트로 통일
+    spans = {tag: [[s, e] for s, e in found] for tag, found in sorted(spans.items())}
+    state.tag_cache[text_hash(full_text)] = {"tags_hash": tags_hash, "spans": spans}
+    return spans
+
+def _current_skill_spans(state: AppState, full_text, tags):
+    """스킬에 지금 부여된 태그들의 일치 위치 (캐시에 저장된 위치 재사용, 없으면 해당 태그만 다시 매칭)"""
+    entry = state.tag_cache.get(text_hash(full_text)) or {}
+    stored = entry.get("spans", {})
+    spans = {tag: stored[tag] for tag in tags if tag in stored}
+    missing = [tag for tag in tags if tag not in stored]
+    if missing: spans.update(TagMatcher(missing).find_spans(full_text))
+    return spans
+
+def get_tag_matcher(state: AppState):
+    """태그 목록으로 만든 Aho-Corasick 오토마톤 (all_tags가 바뀔 때만 재생성)"""
+    tag_set = frozenset(state.all_tags)
+    if state.tag_matcher is None or state.tag_matcher.tag_set != tag_set:
+        state.tag_matcher = TagMatcher(tag_set)
+    return state.tag_matcher
+
+def _commit_character_tags(state: AppState, char, skill_spans):
+    """니케 1명의 스킬별 태그(일치 위치)를 기록하고 tag_counts / 인덱스를 변경분만큼 갱신"""
+    name = char["nikke_name"]
+    skills = char.get("skills", {})
+    for s_key, spans in skill_spans.items():
+        skills[s_key]["tags"] = list(spans)
+
+    old_tags = state.indexer.tags_of(name)
+    state.indexer.upsert_character(char, skill_spans)
+    new_tags = state.indexer.tags_of(name)
+    for t in old_tags - new_tags:
+        state.tag_counts[t] -= 1
+        if state.tag_counts[t] <= 0: del state.tag_counts[t]
+    for t in new_tags - old_tags: state.tag_counts[t] += 1
+
+def remove_character_tags(state: AppState, name):
+    """삭제된 니케를 tag_counts / 인덱스에서 제거"""
+    if state.indexer:
+        for t in state.indexer.tags_of(name):
+            state.tag_counts[t] -= 1
+            if state.tag_counts[t] <= 0: del state.tag_counts[t]
+        state.indexer.remove_character(name)
+    state.tagged_texts.pop(name, None)
+
+def rename_character_tags(state: AppState, old_name, new_name):
+    """이름 변경 시 인덱스 slot과 태깅 기록을 새 이름으로 이전"""
+    if state.indexer: state.indexer.rename_character(old_name, new_name)
+    if old_name in state.tagged_texts:
+        state.tagged_texts[new_name] = state.tagged_texts.pop(old_name)
+
+def _full_retag(state: AppState, tag_set):
     state.tag_counts = Counter()
-    tag_patterns = {}
-    
-    if not state.all_tags:
-        temp_tags = []
-        for g in state.tag_groups.values(): temp_tags.extend(g["tags"])
-        state.all_tags = list(set(temp_tags))
-        
-    for tag in state.all_tags:
-        keyword = re.escape(tag.replace("▲", "").replace("▼", "").strip())
-        pattern = re.compile(rf"{keyword}", re.IGNORECASE)
-        tag_patterns[tag] = pattern
-        
+    state.tagged_texts = {}
+    if state.tag_cache is None: load_tag_cache(state)
+    prev_cache = state.tag_cache
+    tags_hash = _tag_set_hash(tag_set)
+
+    # 이번 DB에서 사용된 엔트리만 남김 (오래된 스킬 텍스트 정리)
+    state.tag_cache = {}
+    tag_spans = {}  # 이름 -> 스킬 -> 태그별 일치 위치 (인덱스의 효과 블록/토큰 위치에 그대로 사용)
     for char in state.database:
         if char['nikke_name'] in state.deleted_nikkes: continue
         
         char_tags = set()
-        skills = char.get("skills", {})
-        for s_key in ["skill1", "skill2", "burst"]:
-            if s_key in skills:
-                skill = skills[s_key]
-                desc = skill.get("desc", "")
-                name = skill.get("name", "")
-                full_text = f"{name} {desc}"
-                
-                found_tags = []
-                for tag, pattern in tag_patterns.items():
-                    if pattern.search(full_text):
-                        found_tags.append(tag)
-                        char_tags.add(tag)
-                skill["tags"] = list(set(found_tags))
+        texts = _char_skill_texts(char)
+        skill_spans = tag_spans[char['nikke_name']] = {}
+        for s_key, full_text in texts.items():
+            spans = skill_spans[s_key] = _cached_skill_spans(state, full_text, tags_hash, prev_cache)
+            char["skills"][s_key]["tags"] = list(spans)
+            char_tags.update(spans)
+        state.tagged_texts[char['nikke_name']] = texts
                 
         for t in char_tags: state.tag_counts[t] += 1
     
-    # ★ [추가] 인덱스 빌드 (태그 생성 후 즉시 인덱싱)
+    # 인덱스 빌드 (태그 생성 후 즉시 인덱싱)
     if not state.indexer:
         state.indexer = TagIndexer()
-    state.indexer.build_index(state.database)
\ No newline at end of file
+    state.indexer.build_index(state.database, tag_spans)
+    state.tagged_tag_set = tag_set
+    if state.tag_cache != prev_cache: save_tag_cache(state)
+
+def _apply_tag_list_delta(state: AppState, tag_set, by_name):
+    """태그 목록 변경분만 반영: 삭제된 태그는 포스팅 제거, 추가된 태그만 새로 매칭"""
+    removed = state.tagged_tag_set - tag_set
+    added = tag_set - state.tagged_tag_set
+    tags_hash = _tag_set_hash(tag_set)
+
+    for tag in removed:
+        state.tag_counts.pop(tag, None)
+        for name in state.indexer.drop_tag(tag):
+            char = by_name.get(name)
+            if not char: continue
+            for skill in char.get("skills", {}).values():
+                if isinstance(skill, dict) and tag in skill.get("tags", []):
+                    skill["tags"].remove(tag)
+
+    if added:
+        added_matcher = TagMatcher(added)
+        for name, texts in state.tagged_texts.items():
+            char = by_name.get(name)
+            if not char: continue
+            hits = {s_key: added_matcher.find_spans(full_text) for s_key, full_text in texts.items()}
+            if not any(hits.values()): continue
+            skill_spans = {}
+            for s_key, found in hits.items():
+                spans = _current_skill_spans(state, texts[s_key], char["skills"][s_key].get("tags", []))
+                spans.update(found)
+                skill_spans[s_key] = _store_cached_skill_spans(state, texts[s_key], tags_hash, spans)
+            _commit_character_tags(state, char, skill_spans)
+
+    # 캐시 엔트리를 새 태그 목록 기준으로 갱신 (재매칭 없이 현재 결과 기록)
+    for name, texts in state.tagged_texts.items():
+        char = by_name.get(name)
+        if not char: continue
+        for s_key, full_text in texts.items():
+            spans = _current_skill_spans(state, full_text, char["skills"][s_key].get("tags", []))
+            _store_cached_skill_spans(state, full_text, tags_hash, spans)
+
+    state.tagged_tag_set = tag_set
+
+def auto_generate_tags(state: AppState, silent=False, chars=None):
+    """
+    스킬 텍스트를 분석하여 태그를 부여하고 인덱스를 갱신합니다.
+    chars를 지정하면 해당 니케만 검사하며, 스킬 텍스트가 바뀐 니케만 다시 태깅합니다.
+    """
+    if not state.all_tags:
+        temp_tags = []
+        for g in state.tag_groups.values(): temp_tags.extend(g["tags"])
+        state.all_tags = list(set(temp_tags))
+    tag_set = frozenset(state.all_tags)
+
+    # 최초 실행: 전체 태깅 후 인덱스 일괄 생성
+    if state.indexer is None or state.tagged_tag_set is None:
+        _full_retag(state, tag_set)
+        return
+
+    by_name = {c.get("nikke_name"): c for c in state.database}
+    cache_dirty = False
+
+    # 태그 목록이 바뀐 경우 변경분만 반영
+    if tag_set != state.tagged_tag_set:
+        _apply_tag_list_delta(state, tag_set, by_name)
+        cache_dirty = True
+
+    # 스킬 텍스트가 바뀐 니케만 재태깅
+    tags_hash = _tag_set_hash(tag_set)
+    for char in (state.database if chars is None else chars):
+        name = char.get("nikke_name")
+        if not name or name in state.deleted_nikkes: continue
+        texts = _char_skill_texts(char)
+        if state.tagged_texts.get(name) == texts:
+            # 스킬 텍스트가 그대로여도 속성(무기/코드 등)·일반 공격 설명 변경은 인덱스에 반영
+            state.indexer.refresh_character(char)
+            continue
+
+        skill_spans = {s_key: _cached_skill_spans(state, full_text, tags_hash) for s_key, full_text in texts.items()}
+        _commit_character_tags(state, char, skill_spans)
+        state.tagged_texts[name] = texts
+        cache_dirty = True
+
+    # 전체 검사 시 DB에서 사라진 니케 정리
+    if chars is None:
+        for name in [n for n in state.tagged_texts if n not in by_name]:
+            remove_character_tags(state, name)
+
+    if cache_dirty: save_tag_cache(state)
@@ -9,7 +9,6 @@ from io_files import (
     load_database, inject_recommended_builds, save_database_silent, auto_generate_tags
 )
 from ui_theme import setup_styles
-from core_utils import match_search
 
 # Import Tab Modules
 from tab_detail_tags import TabDetailTags
@@ -18,7 +17,14 @@ from tab_edit import TabEdit
 from tab_calc import TabCalc
 from tab_compare import TabCompare
 from tab_upgrade import TabUpgrade
-from widgets_common import setup_scroll_binding
+from widgets_common import setup_scroll_binding, sync_treeview_rows
+from core_indexer import popcount
+from core_query import looks_like_query, parse_query, canonical, QueryEngine, QuerySyntaxError, format_plan, format_field_memory, format_cache_stats
+
+# 사이드바 필터 키 -> 니케 데이터 필드 (버스트 필터는 부분 일치)
+FILTER_FIELDS = {"company": "company", "weapon": "weapon", "burst": "burst_type", "role": "role", "code": "code"}
+# 관련도순 정렬 시 점수를 매겨 상단에 표시할 인원
+RANK_TOP_K = 50
 
 class NikkeManagerApp:
     def __init__(self, root):
@@ -31,6 +37,13 @@ class NikkeManagerApp:
         # Initialize Shared State
         self.app_state = AppState()
         self.app_state.search_scope_single_skill = tk.BooleanVar(value=False)
+        self.app_state.search_scope_block = tk.BooleanVar(value=False)
+        self.app_state.search_threshold = tk.BooleanVar(value=False)
+        self.app_state.search_min_match = tk.IntVar(value=2)
+        
+        # 사이드바 목록: 현재 표시 중인 행 / 니케별 행 표시값 캐시
+        self.shown_rows = []
+        self.row_cache = {}
 
         # Load Data
         load_themes(self.app_state)
@@ -135,6 +148,12 @@ class NikkeManagerApp:
         self.search_var.trace_add("write", self.on_search)
         entry = ttk.Entry(search_frame, textvariable=self.search_var)
         entry.pack(fill=tk.X, pady=5)
+        # 스킬 이름/설명까지 검색 (n-gram 전문 색인, "따옴표"로 구문 검색)
+        self.search_text_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="스킬 설명 포함 검색", variable=self.search_text_var, command=self.on_search).pack(anchor="w")
+        # 스킬 설명 검색 시 BM25 관련도순 정렬 (상위 RANK_TOP_K명만 점수순, 나머지는 DB 순서)
+        self.rank_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="관련도순 정렬", variable=self.rank_var, command=self.on_search).pack(anchor="w")
         
         filter_frame = ttk.LabelFrame(self.sidebar, text="필터 (AND)", padding=5)
         filter_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -149,6 +168,9 @@ class NikkeManagerApp:
             ("역할", "role", ["ALL", "화력형", "방어형", "지원형"]),
             ("코드", "code", ["ALL", "작열", "수냉", "풍압", "전격", "철갑"])
         ]
+        # 콤보박스 선택지별 결과 수 표시용
+        self.filter_combos = {}
+        self.filter_choices = {}
         for label, key, values in filters:
             f = ttk.Frame(filter_frame)
             f.pack(fill=tk.X, pady=2)
@@ -156,6 +178,8 @@ class NikkeManagerApp:
             cb = ttk.Combobox(f, textvariable=self.filter_vars[key], values=values, state="readonly", width=15)
             cb.pack(side=tk.RIGHT, expand=True, fill=tk.X)
             cb.bind("<<ComboboxSelected>>", self.on_search)
+            self.filter_combos[key] = cb
+            self.filter_choices[key] = values
             
         list_frame = ttk.Frame(self.sidebar, padding=(10,5,10,10))
         list_frame.pack(fill=tk.BOTH, expand=True)
@@ -206,71 +230,184 @@ class NikkeManagerApp:
         self.tab_detail = TabDetailTags(tab_detail_frame, self.app_state, self.on_search)
         self.tab_detail.create_tag_ui()
         self.tab_upgrade = TabUpgrade(tab_upgrade_frame, self.app_state)
-        self.tab_calc = TabCalc(tab_calc_frame, self.app_state)
+        self.tab_calc = TabCalc(tab_calc_frame, self.app_state, self.tab_upgrade.update_ranking)
         self.tab_compare = TabCompare(tab_compare_frame, self.app_state, self.tab_calc.do_calc)
         self.tab_tag_manage = TabTagManage(tab_tag_manage_frame, self.app_state, self.refresh_tag_ui_globally)
         self.tab_edit = TabEdit(tab_edit_frame, self.app_state, {'search': self.on_search, 'update_all': self.update_all_tabs})
 
+    def get_filter_value(self, key):
+        """콤보박스 표시값 'AR (12)'에서 실제 필터값 'AR' 추출"""
+        return re.sub(r'\s\(\d+\)$', '', self.filter_vars[key].get())
+
     def on_search(self, *args):
         query = self.search_var.get()
-        f_co = self.filter_vars["company"].get()
-        f_wp = self.filter_vars["weapon"].get()
-        f_bs = self.filter_vars["burst"].get()
-        f_ro = self.filter_vars["role"].get()
-        f_cd = self.filter_vars["code"].get()
-        
-        self.nikke_list.delete(*self.nikke_list.get_children())
-        match_count = 0
         
-        is_strict_mode = self.app_state.search_scope_single_skill.get()
+        # 검색 범위: 캐릭터 전체 / 개별 스킬 / 효과 블록
+        if self.app_state.search_scope_block.get(): is_strict_mode = "block"
+        else: is_strict_mode = self.app_state.search_scope_single_skill.get()
 
-        # ★ [개선] 인덱서를 통한 1차 필터링 (Smart Search)
-        if self.app_state.selected_tags_and or self.app_state.selected_tags_or or self.app_state.selected_tags_not:
-            if not self.app_state.indexer:
-                # 안전장치: 인덱서가 없으면 전체 리스트 사용 (Fail-safe)
-                candidate_names = set(c['nikke_name'] for c in self.app_state.database)
-            else:
-                candidate_names = self.app_state.indexer.search(
-                    self.app_state.selected_tags_and,
-                    self.app_state.selected_tags_or,
-                    self.app_state.selected_tags_not,
-                    is_strict_mode
-                )
-        else:
-            # 태그 선택이 없으면 전체 데이터가 후보
-            candidate_names = None # None means all
+        # 안전장치: 인덱서가 없으면 먼저 생성
+        if not self.app_state.indexer:
+            auto_generate_tags(self.app_state, silent=True)
+        indexer = self.app_state.indexer
 
-        for char in self.app_state.database:
-            name = char.get("nikke_name", "")
-            
-            # 1. Indexer Filtering
-            if candidate_names is not None:
-                if name not in candidate_names: continue
-
-            # 2. Filters
-            if f_co != "ALL" and char.get("company") != f_co: continue
-            if f_wp != "ALL" and char.get("weapon") != f_wp: continue
-            if f_bs != "ALL" and f_bs not in char.get("burst_type", ""): continue
-            if f_ro != "ALL" and char.get("role") != f_ro: continue
-            if f_cd != "ALL" and char.get("code") != f_cd: continue
-            
-            # 3. Name Search
-            if query and not match_search(query, name): continue
-            
-            display_name = re.sub(r'\s*\(.*?\)', '', name).strip()
-            info = f"{char.get('code','')}/{char.get('weapon','')}"
-            self.nikke_list.insert("", "end", iid=name, values=(display_name, info))
-            match_count += 1
+        # k-of-n 모드: AND 태그 중 k개 이상 일치 (일치 수가 많은 순서로 표시)
+        min_match = None
+        if self.app_state.search_threshold.get():
+            try: min_match = max(1, int(self.app_state.search_min_match.get()))
+            except (tk.TclError, ValueError): min_match = 1
+
+        filters = {key: self.get_filter_value(key) for key in FILTER_FIELDS}
+        tags_and = self.app_state.selected_tags_and
+        tags_or = self.app_state.selected_tags_or
+        tags_not = self.app_state.selected_tags_not
+
+        text_mode = self.search_text_var.get()
+        ranked = text_mode and self.rank_var.get()
+
+        # 쿼리 문법 (예: tag:공격력▲ AND weapon:SR AND NOT code:작열) → AST로 파싱
+        structured, explain = None, False
+        if looks_like_query(query):
+            try:
+                structured, explain = parse_query(query)
+            except QuerySyntaxError as e:
+                self.tag_count_lbl.config(text=f"쿼리 오류: {e}")
+                return
+
+        # ★ [개선] 같은 조건을 다시 켜고 끄는 경우가 많으므로 결과를 LRU 캐시에서 재사용
+        # (인덱스 version이 바뀌면 캐시는 자동으로 비워짐)
+        cache_key = indexer.query_key(tags_and, tags_or, tags_not, is_strict_mode, filters, query, text_mode, ranked,
+                                      canonical(structured) if structured else None, min_match)
+        # explain은 단계별 결과 수가 필요하므로 캐시를 거치지 않음
+        cached = None if explain else indexer.query_cache.get(cache_key, indexer.version)
+        if cached is None:
+            try:
+                cached = self.run_search(query, tags_and, tags_or, tags_not, is_strict_mode, filters, text_mode, ranked, structured, explain, min_match)
+            except QuerySyntaxError as e:
+                self.tag_count_lbl.config(text=f"쿼리 오류: {e}")
+                return
+            indexer.query_cache.put(cache_key, indexer.version, {k: v for k, v in cached.items() if k != "plan"})
+        self.update_filter_counts(cached["filter_counts"])
+        # 태그 버튼에 "이 태그를 추가하면 남는 수" 표시
+        if hasattr(self, 'tab_detail'):
+            self.tab_detail.update_tag_counts(cached["tag_counts"])
+
+        # 관련도순/유사도순: 상위 slot을 먼저, 나머지는 DB 순서
+        top_slots = cached["top_slots"]
+        top_mask = indexer.mask_from_slots(top_slots)
+        chars = [indexer.slot_chars[s] for s in top_slots] + indexer.chars_from_mask(cached["result"] & ~top_mask)
+        rows = [(char.get("nikke_name", ""), self.get_row_view(char)) for char in chars]
+
+        # ★ [개선] 전체 삭제/재삽입 대신 변경분(삽입/삭제/이동)만 반영
+        sync_treeview_rows(self.nikke_list, self.shown_rows, rows)
+        self.shown_rows = rows
+        match_count = len(rows)
             
-        self.tag_count_lbl.config(text=f"매칭된 니케: {match_count}명")
+        fuzzy_note = " (유사 이름)" if cached.get("fuzzy") else ""
+        self.tag_count_lbl.config(text=f"매칭된 니케: {match_count}명{fuzzy_note}")
         
         txt = ""
-        if self.app_state.selected_tags_and: txt += f"[AND] {len(self.app_state.selected_tags_and)}개 "
+        if self.app_state.selected_tags_and:
+            if min_match: txt += f"[{min(min_match, len(self.app_state.selected_tags_and))}/{len(self.app_state.selected_tags_and)}개 이상] "
+            else: txt += f"[AND] {len(self.app_state.selected_tags_and)}개 "
         if self.app_state.selected_tags_or: txt += f"[OR] {len(self.app_state.selected_tags_or)}개 "
         if self.app_state.selected_tags_not: txt += f"[NOT] {len(self.app_state.selected_tags_not)}개 "
         if not txt: txt = "(선택 없음)"
+        # EXPLAIN 쿼리: 실행 계획과 단계별 결과 수, 색인 메모리, 검색 캐시 통계 표시
+        if cached.get("plan"):
+            txt += "\n[실행 계획]\n" + format_plan(cached["plan"])
+            txt += "\n[필드별 색인 메모리]\n" + format_field_memory(indexer.field_memory())
+            txt += "\n[검색 결과 캐시]\n" + format_cache_stats(indexer.query_cache.stats())
         self.tag_list_lbl.config(text=txt)
 
+    def run_search(self, query, tags_and, tags_or, tags_not, is_strict_mode, filters, text_mode=False, ranked=False, structured=None, explain=False, min_match=None):
+        """
+        인덱스 조회로 검색 결과를 계산합니다.
+        result: 결과 비트마스크 / filter_counts: 필터 선택지별 결과 수 / tag_counts: 태그별 추가 시 결과 수
+        top_slots: 먼저 표시할 slot (관련도순·유사도순) / fuzzy: 오타 허용 결과 여부 / plan: 실행 계획
+        structured가 주어지면 검색어 대신 파싱된 쿼리를 실행합니다.
+        min_match가 주어지면 AND 태그는 k-of-n 조건이 되고, 일치한 태그 수가 많은 순서로 정렬합니다.
+        """
+        indexer = self.app_state.indexer
+
+        # ★ [개선] 인덱서를 통한 1차 필터링 (Smart Search, 비트마스크)
+        if tags_and or tags_or or tags_not:
+            candidates = indexer.search_mask(tags_and, tags_or, tags_not, is_strict_mode, min_match)
+        else:
+            # 태그 선택이 없으면 전체 데이터가 후보
+            candidates = indexer.all_mask
+
+        # ★ [개선] 이름 검색도 인덱스 조회 (정규화/초성 키 사전 계산)
+        plan = None
+        fuzzy_slots = []
+        if structured and candidates:
+            engine = QueryEngine(indexer)
+            candidates = engine.execute(structured, explain, within=candidates)
+            plan = engine.plan
+        elif query and candidates:
+            name_mask = indexer.search_name(query, candidates)
+            # 스킬 설명 포함: 이름 또는 스킬 이름/설명에 검색어가 있는 니케
+            if text_mode: name_mask |= indexer.search_text(query, within=candidates)
+            if not name_mask:
+                # 일치하는 이름이 없으면 오타 허용 검색 (자모 편집 거리 순)
+                fuzzy_slots = indexer.search_name_fuzzy(query, candidates)
+                name_mask = indexer.mask_from_slots(fuzzy_slots)
+            candidates = name_mask
+
+        # ★ [개선] 속성 필터도 facet 비트마스크 교집합으로 처리
+        filter_masks = {}
+        for key, field in FILTER_FIELDS.items():
+            if filters[key] != "ALL":
+                filter_masks[key] = indexer.facet_mask(field, filters[key], substring=(key == "burst"))
+
+        result = candidates
+        for m in filter_masks.values(): result &= m
+
+        # 각 필터 선택지를 골랐을 때의 결과 수 (해당 필터를 제외한 나머지 조건 기준)
+        filter_counts = {}
+        for key, field in FILTER_FIELDS.items():
+            base = candidates
+            for other, m in filter_masks.items():
+                if other != key: base &= m
+            choices = [c for c in self.filter_choices[key] if c != "ALL"]
+            counts = indexer.facet_counts(field, base, choices, substring=(key == "burst"))
+            counts["ALL"] = popcount(base)
+            filter_counts[key] = counts
+
+        # k-of-n 모드에서는 태그 추가가 조건을 좁히지 않으므로 결과 중 해당 태그 보유 수를 표시
+        if min_match and tags_and: tag_counts = indexer.refine_counts(result, self.app_state.all_tags)
+        else: tag_counts = indexer.refine_counts(result, self.app_state.all_tags, tags_and, is_strict_mode)
+        if fuzzy_slots:
+            top_slots = [slot for slot in fuzzy_slots if (result >> slot) & 1]
+        elif ranked and query and not structured:
+            top_slots = indexer.rank_text(query, result, RANK_TOP_K)
+        elif min_match and tags_and:
+            top_slots = indexer.rank_by_match_count(tags_and, result, is_strict_mode)
+        else:
+            top_slots = []
+        return {"result": result, "filter_counts": filter_counts, "tag_counts": tag_counts,
+                "top_slots": top_slots, "fuzzy": bool(fuzzy_slots), "plan": plan}
+
+    def update_filter_counts(self, filter_counts):
+        """콤보박스 선택지에 결과 수 표시"""
+        for key, counts in filter_counts.items():
+            self.filter_combos[key]['values'] = [f"{c} ({counts[c]})" for c in self.filter_choices[key]]
+            current = self.get_filter_value(key)
+            if current in counts:
+                self.filter_vars[key].set(f"{current} ({counts[current]})")
+
+    def get_row_view(self, char):
+        """사이드바 행 표시값 (이름/코드/무기가 그대로면 캐시 재사용)"""
+        name = char.get("nikke_name", "")
+        key = (name, char.get('code',''), char.get('weapon',''))
+        cached = self.row_cache.get(name)
+        if cached and cached[0] == key: return cached[1]
+        
+        display_name = re.sub(r'\s*\(.*?\)', '', name).strip()
+        values = (display_name, f"{key[1]}/{key[2]}")
+        self.row_cache[name] = (key, values)
+        return values
+
     def on_select_nikke(self, event):
         sel = self.nikke_list.selection()
         if not sel: return
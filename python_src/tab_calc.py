@@ -6,11 +6,13 @@ import json
 from collections import defaultdict
 from core_state import AppState
 from core_constants import PARTS, PART_NAMES, OPTION_LIST, OVERLOAD_DATA
-from core_utils import calculate_power_detailed, get_max_value_for_option
+from core_utils import calculate_power_build, get_max_value_for_option
+from core_build import stage_labels, EMPTY_STAGE_LABEL
 
 class TabCalc:
-    def __init__(self, parent, app_state: AppState):
+    def __init__(self, parent, app_state: AppState, on_calc=None):
         self.app_state = app_state
+        self.on_calc = on_calc # 계산 후 호출 (현재 Build 전달)
         
         # 메인 스크롤 캔버스
         canvas = tk.Canvas(parent, highlightthickness=0)
@@ -149,7 +151,7 @@ class TabCalc:
                 row_f.pack(fill=tk.X, pady=2)
                 
                 tv = tk.StringVar(value="옵션없음")
-                sv = tk.StringVar(value="0단계 (0.00%)")
+                sv = tk.StringVar(value=EMPTY_STAGE_LABEL)
                 
                 tv.trace_add("write", self.do_calc)
                 sv.trace_add("write", self.do_calc)
@@ -167,13 +169,8 @@ class TabCalc:
                 def update_vals(event, t_var=tv, s_combo=cb_stg, l_eval=lbl_eval):
                     t = t_var.get()
                     self.update_validity_label(t, l_eval)
-                    if t in OVERLOAD_DATA:
-                        vals = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[t])]
-                        s_combo['values'] = vals
-                        s_combo.current(0)
-                    else:
-                        s_combo['values'] = ["0단계 (0.00%)"]
-                        s_combo.current(0)
+                    s_combo['values'] = stage_labels(t)
+                    s_combo.current(0)
                     self.do_calc()
 
                 cb_type.bind("<<ComboboxSelected>>", update_vals)
@@ -254,22 +251,9 @@ class TabCalc:
     def do_calc(self, *args):
         if not self.app_state.current_nikke: return
         try:
-            p_opts = {}
-            for i, part in enumerate(PARTS):
-                p_opts[part] = {}
-                for j in range(3):
-                    t = self.app_state.calc_opts[i][j][0].get()
-                    s = self.app_state.calc_opts[i][j][1].get()
-                    p_opts[part][f"option{j+1}"] = {"type": t, "stage": s}
-
-            weapon = self.app_state.current_nikke.get('weapon', 'Unknown')
-            res = calculate_power_detailed(
-                self.app_state.calc_vars["hp"].get(), self.app_state.calc_vars["atk"].get(), self.app_state.calc_vars["def"].get(),
-                int(self.app_state.calc_vars["s1"].get()), int(self.app_state.calc_vars["s2"].get()), int(self.app_state.calc_vars["burst"].get()),
-                p_opts, int(self.app_state.calc_vars["cube_lvl"].get()), 
-                self.app_state.calc_vars["col_grade"].get(), int(self.app_state.calc_vars["col_skill1"].get()), int(self.app_state.calc_vars["col_skill2"].get()),
-                weapon, self.app_state.current_nikke
-            )
+            # 입력값 -> Build (옵션 ID / 정수 단계) 로 한 번만 변환하여 계산
+            build = self.app_state.current_build()
+            res = calculate_power_build(build, self.app_state.current_nikke)
             
             total_cp = res["power"]
             grad_score = res["score"]
@@ -311,6 +295,7 @@ class TabCalc:
                     f"{int(item['cp']):,}"
                 ), tags=(tag_color,))
 
+            if self.on_calc: self.on_calc(build)
         except Exception as e: pass
 
     def get_total_grade_str(self, pct):
@@ -327,26 +312,11 @@ class TabCalc:
     
     def save_current_user_data(self):
         if not self.app_state.current_nikke: return
-        p_opts = {}
-        for i, part in enumerate(PARTS):
-            part_list = []
-            for j in range(3):
-                t_var, s_var, _, _, _ = self.app_state.calc_opts[i][j]
-                part_list.append({"type": t_var.get(), "stage": s_var.get()})
-            p_opts[part] = part_list
-        data = {
-            "hp": self.app_state.calc_vars["hp"].get(),
-            "atk": self.app_state.calc_vars["atk"].get(),
-            "def": self.app_state.calc_vars["def"].get(),
-            "s1": self.app_state.calc_vars["s1"].get(),
-            "s2": self.app_state.calc_vars["s2"].get(),
-            "burst": self.app_state.calc_vars["burst"].get(),
-            "cube_lvl": self.app_state.calc_vars["cube_lvl"].get(),
-            "col_grade": self.app_state.calc_vars["col_grade"].get(),
-            "col_skill1": self.app_state.calc_vars["col_skill1"].get(),
-            "col_skill2": self.app_state.calc_vars["col_skill2"].get(),
-            "options": p_opts
-        }
+        try:
+            data = self.app_state.current_build().to_user_data()
+        except ValueError as e:
+            messagebox.showerror("오류", f"입력값을 확인해주세요: {e}")
+            return
         self.app_state.current_nikke["user_data"] = data
         from io_files import save_database_silent
         save_database_silent(self.app_state)
@@ -376,8 +346,8 @@ class TabCalc:
             for j in range(3):
                 t_var, s_var, cb_type, cb_stg, lbl_eval = self.app_state.calc_opts[i][j]
                 t_var.set("옵션없음")
-                s_var.set("0단계 (0.00%)")
-                cb_stg['values'] = ["0단계 (0.00%)"]
+                s_var.set(EMPTY_STAGE_LABEL)
+                cb_stg['values'] = [EMPTY_STAGE_LABEL]
                 self.update_validity_label("옵션없음", lbl_eval)
 
         # 2. 기존 저장된 사용자 데이터 로드
@@ -398,16 +368,12 @@ class TabCalc:
                 for j, opt in enumerate(saved_opts[part]):
                     if j < 3:
                         t_val = opt.get("type", "옵션없음")
-                        s_val = opt.get("stage", "0단계 (0.00%)")
+                        s_val = opt.get("stage", EMPTY_STAGE_LABEL)
                         
                         t_var, s_var, cb_type, cb_stg, lbl_eval = self.app_state.calc_opts[i][j]
                         
                         t_var.set(t_val)
-                        if t_val in OVERLOAD_DATA:
-                            vals = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[t_val])]
-                            cb_stg['values'] = vals
-                        else:
-                            cb_stg['values'] = ["0단계 (0.00%)"]
+                        cb_stg['values'] = stage_labels(t_val)
                         
                         s_var.set(s_val)
                         self.update_validity_label(t_val, lbl_eval)
@@ -490,8 +456,8 @@ class TabCalc:
                 for j in range(3):
                     t_var, s_var, _, cb_stg, lbl_eval = self.app_state.calc_opts[i][j]
                     t_var.set("옵션없음")
-                    s_var.set("0단계 (0.00%)")
-                    cb_stg['values'] = ["0단계 (0.00%)"]
+                    s_var.set(EMPTY_STAGE_LABEL)
+                    cb_stg['values'] = [EMPTY_STAGE_LABEL]
                     self.update_validity_label("옵션없음", lbl_eval)
 
             equipment = ext_data.get("equipment", [])
@@ -522,8 +488,7 @@ class TabCalc:
                     if opt_name in OVERLOAD_DATA:
                         stage_str = self.map_value_to_stage(opt_name, opt_val)
                         t_var.set(opt_name)
-                        vals = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[opt_name])]
-                        cb_stg['values'] = vals
+                        cb_stg['values'] = stage_labels(opt_name)
                         s_var.set(stage_str)
                         self.update_validity_label(opt_name, lbl_eval)
             
@@ -589,7 +554,7 @@ class TabCalc:
     def map_value_to_stage(self, opt_name, value_str):
         """퍼센트 문자열(예: '6.88%')을 단계 문자열(예: '4단계 (6.88%)')로 변환"""
         if opt_name not in OVERLOAD_DATA:
-            return "0단계 (0.00%)"
+            return EMPTY_STAGE_LABEL
             
         try:
             val_str = value_str.replace('%', '').strip()
@@ -605,9 +570,9 @@ class TabCalc:
                     min_diff = diff
                     best_idx = i
             
-            return f"{best_idx}단계 ({stages[best_idx]:.2f}%)"
+            return stage_labels(opt_name)[best_idx]
         except Exception as e:
-            return "0단계 (0.00%)"
+            return EMPTY_STAGE_LABEL
 
     def auto_fill_from_external_data(self):
         """외부 JSON 데이터에서 현재 '옵션없음'인 칸만 자동으로 채움"""
@@ -671,8 +636,7 @@ class TabCalc:
                             
                             t_var.set(opt_name)
                             # 단계 콤보박스 값 갱신
-                            vals = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[opt_name])]
-                            cb_stg['values'] = vals
+                            cb_stg['values'] = stage_labels(opt_name)
                             s_var.set(stage_str)
                             self.update_validity_label(opt_name, lbl_eval)
             
@@ -3,8 +3,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import copy
 from core_state import AppState
-from core_constants import PARTS, PART_NAMES, OPTION_LIST, OVERLOAD_DATA, OVERLOAD_OPT_TYPES
-from core_utils import calculate_power_detailed
+from core_constants import PARTS, PART_NAMES, OPTION_LIST, OVERLOAD_OPT_TYPES
+from core_utils import calculate_power_build
+from core_optimizer import optimize_overload
+from core_build import stage_labels, parse_stage, EMPTY_STAGE_LABEL, OPTION_IDS, NO_OPTION, LINES_PER_PART
 
 class TabCompare:
     def __init__(self, parent, app_state: AppState, calc_callback):
@@ -71,9 +73,85 @@ class TabCompare:
         self.comp_tree.tag_configure("same", foreground="#757575") # Gray
         self.comp_tree.tag_configure("header", background="#f0f0f0", font=("맑은 고딕", 10, "bold"))
 
+        # 4. 최적 옵션 탐색 (4부위 전체, 계산 탭 장비 기준)
+        self.create_optimizer_ui(frame)
+
         # 초기 로드
         self.load_from_calc_tab()
 
+    def create_optimizer_ui(self, parent):
+        opt_frame = ttk.LabelFrame(parent, text="최적 옵션 탐색 (재설정 줄은 목표 단계로 가정, 추천/유효 옵션 후보)", padding=10)
+        opt_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+
+        ctrl = ttk.Frame(opt_frame)
+        ctrl.pack(fill=tk.X)
+        self.opt_objective_var = tk.StringVar(value="cp")
+        ttk.Radiobutton(ctrl, text="전투력", variable=self.opt_objective_var, value="cp").pack(side=tk.LEFT)
+        ttk.Radiobutton(ctrl, text="종결도", variable=self.opt_objective_var, value="score").pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(ctrl, text="최대 재설정:").pack(side=tk.LEFT)
+        self.opt_rerolls_var = tk.IntVar(value=3)
+        ttk.Spinbox(ctrl, from_=0, to=12, width=4, textvariable=self.opt_rerolls_var).pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(ctrl, text="목표 단계:").pack(side=tk.LEFT)
+        self.opt_stage_var = tk.IntVar(value=15)
+        ttk.Spinbox(ctrl, from_=1, to=15, width=4, textvariable=self.opt_stage_var).pack(side=tk.LEFT, padx=(2, 10))
+        self.opt_keep_valid_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(ctrl, text="유효 옵션 줄 유지", variable=self.opt_keep_valid_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(ctrl, text="🔍 탐색", command=self.run_optimizer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(ctrl, text="⬆️ 선택 구성 적용", command=self.apply_optimizer_result).pack(side=tk.RIGHT)
+
+        cols = ("rank", "power", "score", "rerolls", "changes")
+        self.opt_tree = ttk.Treeview(opt_frame, columns=cols, show="headings", height=5)
+        for col, text, width, anchor in (("rank", "#", 40, "center"), ("power", "전투력", 100, "e"),
+                                         ("score", "종결도", 80, "center"), ("rerolls", "재설정", 60, "center"),
+                                         ("changes", "변경 줄", 500, "w")):
+            self.opt_tree.heading(col, text=text)
+            self.opt_tree.column(col, width=width, anchor=anchor)
+        self.opt_tree.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.opt_results = []
+
+    def run_optimizer(self):
+        """계산 탭의 현재 빌드에서 재설정할 줄 조합을 탐색해 상위 구성을 표시"""
+        if not self.app_state.current_nikke: return
+        try:
+            base = self.app_state.current_build()
+            max_rerolls, target_stage = int(self.opt_rerolls_var.get()), int(self.opt_stage_var.get())
+        except (ValueError, KeyError, tk.TclError):
+            messagebox.showwarning("입력 오류", "입력값을 확인해주세요.")
+            return
+
+        nikke = self.app_state.current_nikke
+        locked = ()
+        if self.opt_keep_valid_var.get():
+            valid_ops = nikke.get('overload', {}).get('valid_ops', [])
+            locked = [line for line, t in enumerate(base.types) if OPTION_LIST[t] in valid_ops]
+
+        self.opt_results = optimize_overload(base, nikke, self.opt_objective_var.get(), max_rerolls, locked,
+                                             target_stage=target_stage, top_k=10)
+        self.opt_tree.delete(*self.opt_tree.get_children())
+        for rank, res in enumerate(self.opt_results, 1):
+            changes = ", ".join(
+                f"{PART_NAMES[PARTS[line // LINES_PER_PART]]}{line % LINES_PER_PART + 1}: {OPTION_LIST[t]} {s}단계"
+                for line, _, (t, s) in res["changes"]) or "(현재 구성 유지)"
+            self.opt_tree.insert("", "end", iid=str(rank - 1), values=(
+                rank, f"{res['power']:,}", f"{res['score']:.2f}%", res["rerolls"], changes))
+
+    def apply_optimizer_result(self):
+        """선택한 탐색 결과의 4부위 옵션을 계산 탭에 반영"""
+        sel = self.opt_tree.selection()
+        if not sel or not self.opt_results: return
+        options = self.opt_results[int(sel[0])]["build"].to_user_data()["options"]
+
+        for part_idx, part_key in enumerate(PARTS):
+            for i, opt in enumerate(options[part_key]):
+                dest_t, dest_s, _, dest_cb_s, _ = self.app_state.calc_opts[part_idx][i]
+                dest_t.set(opt["type"])
+                dest_cb_s['values'] = stage_labels(opt["type"])
+                dest_s.set(opt["stage"])
+
+        if self.calc_callback: self.calc_callback()
+        self.load_from_calc_tab()
+        messagebox.showinfo("적용", "전투력 계산 탭에 반영되었습니다.")
+
     def create_option_rows(self, parent_frame):
         var_list = []
         for i in range(3):
@@ -81,7 +159,7 @@ class TabCompare:
             f.pack(fill=tk.X, pady=3)
             
             tv = tk.StringVar(value="옵션없음")
-            sv = tk.StringVar(value="0단계 (0.00%)")
+            sv = tk.StringVar(value=EMPTY_STAGE_LABEL)
             
             # 값이 바뀔 때 비교 로직 실행
             tv.trace_add("write", self.do_compare)
@@ -99,13 +177,8 @@ class TabCompare:
             # 콤보박스 선택 시 단계 리스트 갱신 로직
             def on_type_change(event, t_var=tv, cb_stage=cb_s, l_eval=lbl_eval):
                 opt_type = t_var.get()
-                if opt_type in OVERLOAD_DATA:
-                    vals = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[opt_type])]
-                    cb_stage['values'] = vals
-                    cb_stage.current(0)
-                else:
-                    cb_stage['values'] = ["0단계 (0.00%)"]
-                    cb_stage.current(0)
+                cb_stage['values'] = stage_labels(opt_type)
+                cb_stage.current(0)
                 
                 self.update_validity_label(opt_type, l_eval)
                 self.do_compare()
@@ -157,10 +230,7 @@ class TabCompare:
                 dest_t.set(t_val)
                 
                 # 드롭박스 갱신
-                if t_val in OVERLOAD_DATA:
-                    dest_cb_s['values'] = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[t_val])]
-                else:
-                    dest_cb_s['values'] = ["0단계 (0.00%)"]
+                dest_cb_s['values'] = stage_labels(t_val)
                     
                 dest_s.set(src_s.get())
                 self.update_validity_label(t_val, dest_lbl)
@@ -179,10 +249,7 @@ class TabCompare:
             t_val = src_t.get()
             dest_t.set(t_val)
             
-            if t_val in OVERLOAD_DATA:
-                dest_cb_s['values'] = [f"{k}단계 ({v}%)" for k, v in enumerate(OVERLOAD_DATA[t_val])]
-            else:
-                dest_cb_s['values'] = ["0단계 (0.00%)"]
+            dest_cb_s['values'] = stage_labels(t_val)
                 
             dest_s.set(src_s.get())
             
@@ -193,49 +260,24 @@ class TabCompare:
         """두 가지 설정에 대해 전체 전투력 계산을 수행하고 비교"""
         if not self.app_state.current_nikke: return
         
-        # 1. 기본 스탯 정보 가져오기 (TabCalc의 변수 사용)
+        # 1. 계산 탭의 현재 빌드 (기본 스탯/스킬/큐브/소장품 + 4부위 옵션)
         try:
-            hp = self.app_state.calc_vars["hp"].get()
-            atk = self.app_state.calc_vars["atk"].get()
-            defn = self.app_state.calc_vars["def"].get()
-            s1 = int(self.app_state.calc_vars["s1"].get())
-            s2 = int(self.app_state.calc_vars["s2"].get())
-            burst = int(self.app_state.calc_vars["burst"].get())
-            cube = int(self.app_state.calc_vars["cube_lvl"].get())
-            cg = self.app_state.calc_vars["col_grade"].get()
-            cs1 = int(self.app_state.calc_vars["col_skill1"].get())
-            cs2 = int(self.app_state.calc_vars["col_skill2"].get())
-            weapon = self.app_state.current_nikke.get('weapon', 'Unknown')
-        except:
+            base = self.app_state.current_build()
+        except (ValueError, KeyError, TypeError, tk.TclError):
             return # 입력값 오류 시 중단
 
-        # 2. 전체 옵션 구성 (나머지 3부위는 그대로, 선택 부위만 변경)
-        selected_part = self.comp_part_var.get()
-        
-        def build_full_options(target_ui_vars):
-            full_opts = {}
-            for i, part in enumerate(PARTS):
-                full_opts[part] = {}
-                # 현재 비교중인 부위라면 -> Compare 탭의 UI 값 사용
-                if part == selected_part:
-                    for j in range(3):
-                        t = target_ui_vars[j][0].get()
-                        s = target_ui_vars[j][1].get()
-                        full_opts[part][f"option{j+1}"] = {"type": t, "stage": s}
-                # 다른 부위라면 -> Calc 탭의 기존 값 사용
-                else:
-                    for j in range(3):
-                        t = self.app_state.calc_opts[i][j][0].get()
-                        s = self.app_state.calc_opts[i][j][1].get()
-                        full_opts[part][f"option{j+1}"] = {"type": t, "stage": s}
-            return full_opts
+        # 2. 선택 부위의 3줄만 Compare 탭의 UI 값으로 바꾼 빌드 (나머지 3부위는 그대로)
+        first_line = PARTS.index(self.comp_part_var.get()) * LINES_PER_PART
 
-        opts_before = build_full_options(self.comp_before_vars)
-        opts_after = build_full_options(self.comp_after_vars)
+        def with_part(target_ui_vars):
+            build = base
+            for j in range(LINES_PER_PART):
+                build = build.with_line(first_line + j, OPTION_IDS.get(target_ui_vars[j][0].get(), NO_OPTION), parse_stage(target_ui_vars[j][1].get()))
+            return build
 
         # 3. 계산 수행
-        res_before = calculate_power_detailed(hp, atk, defn, s1, s2, burst, opts_before, cube, cg, cs1, cs2, weapon, self.app_state.current_nikke)
-        res_after = calculate_power_detailed(hp, atk, defn, s1, s2, burst, opts_after, cube, cg, cs1, cs2, weapon, self.app_state.current_nikke)
+        res_before = calculate_power_build(with_part(self.comp_before_vars), self.app_state.current_nikke)
+        res_after = calculate_power_build(with_part(self.comp_after_vars), self.app_state.current_nikke)
 
         # 4. 결과 출력
         self.comp_tree.delete(*self.comp_tree.get_children())
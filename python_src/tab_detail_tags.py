@@ -2,7 +2,7 @@
 import tkinter as tk
 from tkinter import ttk
 from core_state import AppState
-from widgets_common import setup_scroll_binding
+from widgets_common import setup_scroll_binding, HoverTip
 
 class TabDetailTags:
     def __init__(self, parent, app_state: AppState, search_callback):
@@ -10,6 +10,11 @@ class TabDetailTags:
         self.search_callback = search_callback
         self.tag_buttons = {}
         self.tag_dashboard_frame = None
+        # 현재 검색 결과에 태그를 추가(AND)했을 때 남는 니케 수 (None이면 전체 기준 tag_counts 사용)
+        self.refined_counts = None
+        # 스킬 텍스트 위젯 -> [(start, end, 설명)] : 하이라이트 구간별 "왜 일치했는지" 툴팁 내용
+        self.match_notes = {}
+        self.hover_tip = HoverTip(parent)
         
         # 메인 패널 (전체)
         self.detail_paned = ttk.PanedWindow(parent, orient=tk.HORIZONTAL)
@@ -32,6 +37,29 @@ class TabDetailTags:
             command=self.search_callback
         ).pack(side=tk.RIGHT)
         
+        ttk.Checkbutton(
+            header_frame, 
+            text="같은 효과 내 일치", 
+            variable=self.app_state.search_scope_block,
+            command=self.search_callback
+        ).pack(side=tk.RIGHT)
+
+        # k-of-n: 선택한 AND 태그 중 N개 이상 일치 (일치 수 많은 순)
+        ttk.Label(header_frame, text="개 이상").pack(side=tk.RIGHT)
+        min_match_spin = ttk.Spinbox(
+            header_frame, from_=1, to=20, width=3,
+            textvariable=self.app_state.search_min_match,
+            command=self.search_callback
+        )
+        min_match_spin.pack(side=tk.RIGHT)
+        min_match_spin.bind("<Return>", lambda e: self.search_callback())
+        ttk.Checkbutton(
+            header_frame, 
+            text="최소", 
+            variable=self.app_state.search_threshold,
+            command=self.search_callback
+        ).pack(side=tk.RIGHT)
+        
         self.tag_split_pane = ttk.PanedWindow(tag_main_frame, orient=tk.HORIZONTAL)
         self.tag_split_pane.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
         
@@ -116,6 +144,10 @@ class TabDetailTags:
                           relief="flat", padx=10, pady=10, font=("맑은 고딕", 10))
             txt.pack(side=tk.LEFT, fill=tk.X, expand=True)
             txt.config(state=tk.DISABLED)
+            # 하이라이트 이벤트는 한 번만 연결하고, 색상은 갱신 시 현재 테마로 설정
+            for hl in ("match_and", "match_or"):
+                txt.tag_bind(hl, "<Motion>", lambda e, w=txt: self.show_match_tip(w, e))
+                txt.tag_bind(hl, "<Leave>", lambda e: self.hover_tip.hide())
             
             # (헤더라벨, 텍스트위젯) 저장
             self.det_skill_texts.append((lbl_header, txt))
@@ -203,6 +235,10 @@ class TabDetailTags:
         self.search_callback()
 
     def refresh_selected_tags_view(self):
+        self.refresh_tag_buttons()
+        self.refresh_tag_summary_layer()
+
+    def refresh_tag_buttons(self):
         for tag, btn in self.tag_buttons.items():
             if tag in self.app_state.selected_tags_and:
                 btn.config(bg=self.app_state.colors["rec_bg"], fg="#ffffff", text=f"✔ {tag}") 
@@ -211,10 +247,20 @@ class TabDetailTags:
             elif tag in self.app_state.selected_tags_not:
                 btn.config(bg="#555555", fg="#aaaaaa", text=f"✖ {tag}") 
             else:
-                count = self.app_state.tag_counts.get(tag, 0)
-                btn.config(bg=self.app_state.colors["tag_bg"], fg=self.app_state.colors["tag_fg"], text=f"{tag} ({count})")
+                count = self.get_tag_count(tag)
+                # 추가해도 결과가 없는 태그(막다른 조합)는 흐리게 표시
+                fg = self.app_state.colors["tag_fg"] if count > 0 else self.app_state.colors["text_dim"]
+                btn.config(bg=self.app_state.colors["tag_bg"], fg=fg, text=f"{tag} ({count})")
 
-        self.refresh_tag_summary_layer()
+    def get_tag_count(self, tag):
+        if self.refined_counts is None: return self.app_state.tag_counts.get(tag, 0)
+        return self.refined_counts.get(tag, 0)
+
+    def update_tag_counts(self, refined_counts):
+        """검색 결과가 바뀔 때 태그 버튼의 숫자를 조건부 결과 수로 갱신"""
+        if refined_counts == self.refined_counts: return
+        self.refined_counts = refined_counts
+        self.refresh_tag_buttons()
 
     def refresh_tag_summary_layer(self):
         if not self.tag_dashboard_frame: return
@@ -320,19 +366,40 @@ class TabDetailTags:
                 desc = s_data.get('desc', '').replace('\n', '\n')
                 txt_widget.insert("1.0", desc)
                 
-            # 태그 하이라이팅
-            for tag in self.app_state.selected_tags_and: self.highlight_text(txt_widget, tag, self.app_state.colors["rec_bg"])
-            for tag in self.app_state.selected_tags_or: self.highlight_text(txt_widget, tag, self.app_state.colors["invalid"])
+            # 태그 하이라이팅 (색인에 저장된 일치 위치 사용)
+            self.highlight_text(txt_widget, c['nikke_name'], key, s_data or {}, display_titles[i])
             txt_widget.config(state=tk.DISABLED)
 
-    def highlight_text(self, text_widget, pattern, bg_color):
-        start = "1.0"
-        search_kw = pattern.replace("▲", "").replace("▼", "").strip()
-        if not search_kw: search_kw = pattern
-        while True:
-            pos = text_widget.search(search_kw, start, stopindex=tk.END)
-            if not pos: break
-            end = f"{pos}+{len(search_kw)}c"
-            text_widget.tag_add(search_kw, pos, end)
-            text_widget.tag_config(search_kw, background=bg_color, foreground="white")
-            start = end
\ No newline at end of file
+    def highlight_text(self, text_widget, name, sk_key, skill, title):
+        """
+        선택한 AND/OR 태그의 일치 구간을 위젯당 한 번의 tag_add로 표시합니다.
+        (Text.search 반복 대신 인덱서가 태깅 시 저장한 오프셋 사용)
+        """
+        notes = []
+        self.match_notes[text_widget] = notes
+        # 테마 변경 후에도 현재 색상을 쓰도록 매번 설정
+        text_widget.tag_config("match_and", background=self.app_state.colors["rec_bg"], foreground="white")
+        text_widget.tag_config("match_or", background=self.app_state.colors["invalid"], foreground="white")
+        indexer = self.app_state.indexer
+        if not indexer or not skill: return
+        desc = skill.get('desc', '')
+        for hl, label, tags in (("match_and", "AND", self.app_state.selected_tags_and),
+                                ("match_or", "OR", self.app_state.selected_tags_or)):
+            if not tags: continue
+            ranges = []
+            for tag, spans in indexer.match_spans(name, sk_key, tags, skill).items():
+                for start, end in spans:
+                    ranges += [f"1.0+{start}c", f"1.0+{end}c"]
+                    line_no = desc.count("\n", 0, start)
+                    line = desc.split("\n")[line_no].strip()
+                    notes.append((start, end, f"[{label}] {tag}\n{title} · {line_no + 1}번째 줄\n{line}"))
+            if ranges: text_widget.tag_add(hl, *ranges)
+
+    def show_match_tip(self, text_widget, event):
+        """하이라이트 위에 마우스를 올리면 해당 구간이 어떤 태그/줄 때문에 일치했는지 표시"""
+        offset = text_widget.count("1.0", f"@{event.x},{event.y}", "chars")
+        if isinstance(offset, tuple): offset = offset[0]
+        offset = offset or 0
+        lines = [note for start, end, note in self.match_notes.get(text_widget, ()) if start <= offset < end]
+        if lines: self.hover_tip.show(event.x_root, event.y_root, "\n\n".join(lines))
+        else: self.hover_tip.hide()
\ No newline at end of file
@@ -3,7 +3,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
 import re
 from core_state import AppState
-from io_files import save_database_silent, auto_generate_tags
+from io_files import save_database_silent, auto_generate_tags, remove_character_tags, rename_character_tags
 from core_constants import CONST_COMPANIES, CONST_ROLES, CONST_WEAPONS, CONST_CODES, CONST_BURSTS, OVERLOAD_OPT_TYPES
 from widgets_common import setup_scroll_binding
 
@@ -311,8 +311,10 @@ class TabEdit:
             
         save_database_silent(self.app_state)
         
-        # 태그 재분석 및 인덱스 리빌딩
-        auto_generate_tags(self.app_state, silent=True)
+        # 태그 재분석 및 인덱스 갱신 (현재 니케만)
+        if old_name != new_name:
+            rename_character_tags(self.app_state, old_name, new_name)
+        auto_generate_tags(self.app_state, silent=True, chars=[c])
         
         messagebox.showinfo("성공", f"[{new_name}] 정보가 저장되었습니다!")
         self.callbacks['search']() 
@@ -344,6 +346,7 @@ class TabEdit:
         
         self.app_state.database.append(new_char)
         self.app_state.current_nikke = new_char
+        auto_generate_tags(self.app_state, silent=True, chars=[new_char]) # 검색 인덱스에 등록
         
         self.callbacks['search']()
         self.update_content()
@@ -366,8 +369,8 @@ class TabEdit:
             save_database_silent(self.app_state)
             self.app_state.current_nikke = None
             
-            # 삭제 후에도 태그 정보 등 갱신
-            auto_generate_tags(self.app_state, silent=True)
+            # 삭제 후에도 태그 정보 등 갱신 (인덱스에서 해당 니케만 제거)
+            remove_character_tags(self.app_state, target_name)
             
             self.callbacks['search']()
             self.clear_fields()
@@ -1,8 +1,10 @@
 # tab_upgrade.py
+import threading
 import tkinter as tk
 from tkinter import ttk
 from core_state import AppState
 from core_constants import OVERLOAD_DATA, WEAPON_OPTION_DEFAULTS
+from core_upgrade import UpgradeRanker
 
 class TabUpgrade:
     def __init__(self, parent, app_state: AppState):
@@ -39,6 +41,48 @@ class TabUpgrade:
         self.upg_cube_lbl = ttk.Label(cb_frame, text="데이터 없음", font=("맑은 고딕", 11))
         self.upg_cube_lbl.pack(anchor="w")
 
+        # 4. 한 단계 육성 효율 프레임 (전투력 계산 탭의 현재 빌드 기준)
+        rk_frame = ttk.LabelFrame(frame, text="📈 한 단계 육성 효율 (자원당 증가량 순, 전투력 계산 탭 기준)", padding=15)
+        rk_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        rk_top = ttk.Frame(rk_frame)
+        rk_top.pack(fill=tk.X)
+        self.rank_metric_var = tk.StringVar(value="cp")
+        ttk.Radiobutton(rk_top, text="전투력 기준", variable=self.rank_metric_var, value="cp", command=self.update_ranking).pack(side=tk.LEFT)
+        ttk.Radiobutton(rk_top, text="종결도 기준", variable=self.rank_metric_var, value="score", command=self.update_ranking).pack(side=tk.LEFT, padx=10)
+        self.rank_summary_lbl = ttk.Label(rk_top, text="", foreground="gray")
+        self.rank_summary_lbl.pack(side=tk.RIGHT)
+
+        cols = ("rank", "item", "cp", "score", "cost", "eff")
+        self.rank_tree = ttk.Treeview(rk_frame, columns=cols, show="headings", height=8)
+        for col, text, width, anchor in (("rank", "#", 40, "center"), ("item", "육성 항목", 320, "w"),
+                                         ("cp", "전투력 +", 90, "e"), ("score", "종결도 +", 90, "e"),
+                                         ("cost", "비용", 60, "center"), ("eff", "자원당 효율", 110, "e")):
+            self.rank_tree.heading(col, text=text)
+            self.rank_tree.column(col, width=width, anchor=anchor)
+        self.rank_tree.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+
+        # 빌드 부분합 캐시: 계산 탭 입력이 하나 바뀌면 바뀐 부분만 다시 계산
+        self.ranker = UpgradeRanker()
+
+        # 5. 재설정 시뮬레이션 프레임 (몬테카를로, NumPy 필요)
+        sim_frame = ttk.LabelFrame(frame, text="🎲 오버로드 재설정 시뮬레이션 (목표 종결도까지 필요한 재설정/모듈)", padding=15)
+        sim_frame.pack(fill=tk.X, pady=10)
+
+        sim_top = ttk.Frame(sim_frame)
+        sim_top.pack(fill=tk.X)
+        ttk.Label(sim_top, text="목표 종결도(%):").pack(side=tk.LEFT)
+        self.sim_target_var = tk.IntVar(value=60)
+        ttk.Spinbox(sim_top, from_=1, to=100, width=5, textvariable=self.sim_target_var).pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(sim_top, text="시행 수:").pack(side=tk.LEFT)
+        self.sim_trials_var = tk.StringVar(value="200000")
+        ttk.Combobox(sim_top, textvariable=self.sim_trials_var, values=["50000", "100000", "200000", "500000"], width=8, state="readonly").pack(side=tk.LEFT, padx=(2, 10))
+        self.sim_btn = ttk.Button(sim_top, text="▶ 실행", command=self.run_simulation)
+        self.sim_btn.pack(side=tk.LEFT)
+
+        self.sim_lbl = ttk.Label(sim_frame, text="전투력 계산 탭의 현재 장비에서 시작합니다.", font=("맑은 고딕", 10), justify="left")
+        self.sim_lbl.pack(anchor="w", pady=(5, 0))
+
     def update_content(self):
         c = self.app_state.current_nikke
         if not c: 
@@ -90,4 +134,77 @@ class TabUpgrade:
         
         # 큐브 정보 업데이트
         cubes = c.get('overload', {}).get('recommended_cubes', [])
-        self.upg_cube_lbl.config(text=", ".join(cubes) if cubes else "정보 없음")
\ No newline at end of file
+        self.upg_cube_lbl.config(text=", ".join(cubes) if cubes else "정보 없음")
+        self.update_ranking()
+
+    def update_ranking(self, build=None):
+        """한 단계 육성 후보를 자원당 증가량 순으로 표시 (build 생략 시 계산 탭 입력값)"""
+        c = self.app_state.current_nikke
+        if not c: return
+        if build is None:
+            try:
+                build = self.app_state.current_build()
+            except (ValueError, KeyError, TypeError):
+                return # 계산 탭 미초기화 / 입력값 오류
+
+        metric = self.rank_metric_var.get()
+        current, rows = self.ranker.rank(build, c, metric)
+        self.rank_summary_lbl.config(text=f"현재 전투력 {current['power']:,} / 종결도 {current['score']:.1f}%")
+
+        self.rank_tree.delete(*self.rank_tree.get_children())
+        for i, r in enumerate(rows, 1):
+            eff = f"{r['cp_per_cost']:,.0f} CP" if metric == "cp" else f"{r['score_per_cost']:.2f}%"
+            self.rank_tree.insert("", "end", values=(
+                i, r["label"], f"+{r['cp']:,}", f"+{r['score']:.2f}%", r["cost"], eff))
+
+    def run_simulation(self):
+        """재설정 몬테카를로 시뮬레이션을 백그라운드에서 실행하고 결과를 표시"""
+        c = self.app_state.current_nikke
+        if not c: return
+        try:
+            build = self.app_state.current_build()
+            target, trials = float(self.sim_target_var.get()), int(self.sim_trials_var.get())
+        except (ValueError, KeyError, TypeError, tk.TclError):
+            self.sim_lbl.config(text="입력값을 확인해주세요.")
+            return
+        try:
+            from core_simulator import simulate_rerolls
+        except ImportError:
+            self.sim_lbl.config(text="시뮬레이션에는 NumPy가 필요합니다. (pip install numpy)")
+            return
+
+        result = {}
+        def work():
+            try: result["res"] = simulate_rerolls(build, c, target, trials=trials)
+            except Exception as e: result["err"] = e
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        self.sim_btn.config(state=tk.DISABLED)
+        self.sim_lbl.config(text=f"시뮬레이션 중... ({trials:,}회)")
+
+        def poll():
+            if worker.is_alive():
+                self.sim_lbl.after(200, poll)
+                return
+            self.sim_btn.config(state=tk.NORMAL)
+            if "err" in result: self.sim_lbl.config(text=f"시뮬레이션 오류: {result['err']}")
+            else: self.sim_lbl.config(text=self.format_simulation(result["res"]))
+        poll()
+
+    @staticmethod
+    def format_simulation(res):
+        head = f"목표 {res['target']:g}% (현재 {res['start_score']:.1f}%, 잠금 기준 줄당 {res['lock_pct']:.0f}%) · {res['trials']:,}회"
+        if not res["reachable"]:
+            return head + "\n현재 유효 옵션/확률 설정으로는 도달할 수 없는 목표입니다."
+        r, m, p = res["rerolls"], res["cost"], res["power"]
+        if r is None:
+            return head + f"\n도달률 {res['reached_rate'] * 100:.1f}% - 재설정 상한 안에 도달한 시행이 없습니다."
+        lines = [
+            head + f" · 도달률 {res['reached_rate'] * 100:.1f}%",
+            f"재설정 횟수: 평균 {r['mean']:,.1f} (±{r['se']:.2f}) / 중앙 {r['p50']:,.0f} / 75% {r['p75']:,.0f} / 90% {r['p90']:,.0f} / 99% {r['p99']:,.0f}",
+            f"모듈 비용: 평균 {m['mean']:,.1f} / 중앙 {m['p50']:,.0f} / 90% {m['p90']:,.0f} / 99% {m['p99']:,.0f}",
+            f"도달 시 전투력: 평균 {p['mean']:,.0f} (현재 {res['start_power']:,}) / 중앙 {p['p50']:,.0f} / 90% {p['p90']:,.0f}",
+            "수렴: " + " → ".join(f"{c['trials'] // 1000}k {c['mean']:.2f}" for c in res["convergence"][::3])
+            + (" (수렴)" if res["converged"] else " (표본 부족 - 시행 수를 늘려보세요)"),
+        ]
+        return "\n".join(lines)
@@ -10,4 +10,52 @@ def setup_scroll_binding(widget, target_scrollable=None):
     widget.bind("<MouseWheel>", _on_mousewheel)
     widget.bind("<Button-4>", _on_mousewheel)
     widget.bind("<Button-5>", _on_mousewheel)
-    for child in widget.winfo_children(): setup_scroll_binding(child, scroll_target)
\ No newline at end of file
+    for child in widget.winfo_children(): setup_scroll_binding(child, scroll_target)
+
+class HoverTip:
+    """마우스 위치에 잠깐 띄우는 설명 창 (하나를 재사용)"""
+    def __init__(self, master):
+        self.master = master
+        self.win = None
+        self.label = None
+
+    def show(self, x_root, y_root, text):
+        if self.win is None or not self.win.winfo_exists():
+            self.win = tk.Toplevel(self.master)
+            self.win.wm_overrideredirect(True)
+            self.label = tk.Label(self.win, justify="left", background="#ffffe0", relief="solid", borderwidth=1,
+                                  font=("맑은 고딕", 9), padx=6, pady=4)
+            self.label.pack()
+        self.label.config(text=text)
+        self.win.wm_geometry(f"+{x_root + 12}+{y_root + 12}")
+        self.win.deiconify()
+
+    def hide(self):
+        if self.win is not None and self.win.winfo_exists(): self.win.withdraw()
+
+def sync_treeview_rows(tree, prev_rows, new_rows):
+    """
+    Treeview를 전부 지우고 다시 넣는 대신, 이전 결과와 새 결과의 차이(삭제/삽입/이동/값 변경)만 반영합니다.
+    prev_rows / new_rows: [(iid, values), ...] (화면 표시 순서)
+    """
+    new_iids = {iid for iid, _ in new_rows}
+    removed = [iid for iid, _ in prev_rows if iid not in new_iids]
+    if removed: tree.delete(*removed)
+
+    prev_values = {iid: values for iid, values in prev_rows}
+    kept = [iid for iid, _ in prev_rows if iid in new_iids]
+    placed = set()
+    k = 0
+    # 불변식: i번째 처리 전 children = new_rows[:i] + (아직 배치 안 된 kept 순서대로)
+    for i, (iid, values) in enumerate(new_rows):
+        while k < len(kept) and kept[k] in placed: k += 1
+        if iid not in prev_values:
+            tree.insert("", i, iid=iid, values=values)
+            continue
+        if k < len(kept) and kept[k] == iid:
+            k += 1
+        else:
+            tree.move(iid, "", i)
+        placed.add(iid)
+        if prev_values[iid] != values:
+            tree.item(iid, values=values)
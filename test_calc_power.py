@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_src"))
+
+from core_batch import calculate_power_batch, encode_builds
+from core_build import Build, NO_OPTION
+from core_constants import PARTS
+from core_utils import calculate_power_build, calculate_power_detailed
+
+STATS = (1000000, 50000, 10000, 10, 10, 10, 15, "SSR", 15, 15)
+
+def _part_options(first_type, first_stage):
+    options = {p: {f"option{i}": {"type": "옵션없음", "stage": "0단계 (0.00%)"} for i in range(1, 4)} for p in PARTS}
+    options[PARTS[0]]["option1"] = {"type": first_type, "stage": first_stage}
+    return options
+
+def test_unknown_option_type_adds_no_power():
+    # 알 수 없는 옵션 이름은 옵션없음으로 취급: 단계가 있어도 전투력/종결도에 반영하지 않음
+    # (문자열 기반 계산은 단계 * 0.0069를 CP 계수에 더했음)
+    unknown = calculate_power_detailed(*STATS[:6], _part_options("없어진 옵션", "10"), *STATS[6:], None)
+    empty = calculate_power_detailed(*STATS[:6], _part_options("옵션없음", "0단계 (0.00%)"), *STATS[6:], None)
+    assert unknown["power"] == empty["power"]
+    assert unknown["details"]["ol_cp"] == 0
+    assert unknown["details"]["ol_aggregated"] == []
+
+def test_unknown_option_type_in_user_data():
+    data = {"options": {PARTS[0]: [{"type": "없어진 옵션", "stage": "10단계"}]}}
+    build = Build.from_user_data(data)
+    assert build.types[0] == NO_OPTION
+    batch = calculate_power_batch(*encode_builds([build]), False)
+    assert batch["power"][0] == calculate_power_build(build)["power"] == calculate_power_build(Build.from_user_data({}))["power"]
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_src"))
+
+from core_build import Build, OPTION_IDS, LINES_PER_PART
+from core_optimizer import optimize_overload
+
+NIKKE = {"overload": {"valid_ops": ["공격력 증가", "우월코드 대미지 증가", "최대 장탄 수 증가"]}}
+
+def test_no_duplicates_from_line_order():
+    # 부위 안에서 줄 순서만 다른 구성은 한 번만 나와야 함
+    results = optimize_overload(Build(1000000, 50000, 10000, 10, 10, 10), NIKKE, "score", top_k=10)
+    parts = [
+        tuple(tuple(sorted(zip(r["build"].types[p:p + LINES_PER_PART], r["build"].stages[p:p + LINES_PER_PART])))
+              for p in range(0, len(r["build"].types), LINES_PER_PART))
+        for r in results
+    ]
+    assert len(results) == 10
+    assert len(set(parts)) == len(parts)
+
+def test_keeps_fewest_rerolls_for_same_lines():
+    # 첫 줄이 이미 공격력 15단계: 0번 줄을 바꾸고 다른 줄에 공격력을 다시 붙이는 구성 대신 한 줄만 바꾸는 구성이 남음
+    atk, elem = OPTION_IDS["공격력 증가"], OPTION_IDS["우월코드 대미지 증가"]
+    build = Build(1000000, 50000, 10000, 10, 10, 10, types=[atk] + [0] * 11, stages=[15] + [0] * 11)
+    results = optimize_overload(build, NIKKE, "cp", max_rerolls=2, locked=range(3, 12), top_k=10)
+    same = [r for r in results if sorted(zip(r["build"].types[:3], r["build"].stages[:3])) == sorted([(0, 0), (atk, 15), (elem, 15)])]
+    assert len(same) == 1
+    assert same[0]["rerolls"] == 1
+    assert same[0]["changes"][0][0] != 0
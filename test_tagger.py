@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_src"))
+
+from core_tagger import TagMatcher
+
+TAGS = ["공격력▲", "공격 속도▼", "최대 체력▲", "방어력▼"]
+
+def test_direction_in_corner_brackets():
+    # 메어리 : 베이 갓데스 버스트: 「」 괄호 안의 방향 효과
+    text = "고요한 수면 수냉 코드 아군 전체에게: 「공격력 23.23% ▲」「3초 유지」"
+    matcher = TagMatcher(TAGS)
+    spans = matcher.find_spans(text)
+    assert set(spans) == {"공격력▲"}
+    assert [text[s:e] for s, e in spans["공격력▲"]] == ["공격력"]
+
+def test_direction_without_brackets():
+    # K 버스트: 괄호 없이 줄에 적힌 방향 효과
+    text = "최종 공격력 92.5% 대미지\n펠릿 개수 : 10개\n공격 속도 : 90% ▼\n유지시간 : 10초"
+    matcher = TagMatcher(TAGS)
+    spans = matcher.find_spans(text)
+    assert set(spans) == {"공격 속도▼"}
+    assert [text[s:e] for s, e in spans["공격 속도▼"]] == ["공격 속도"]
+
+def test_direction_must_match():
+    text = "적에게: 「방어력 10% ▼」\n자신에게: 공격력 5% ▼ [최대 체력 3% ▲]"
+    assert set(TagMatcher(TAGS).find_spans(text)) == {"방어력▼", "최대 체력▲"}